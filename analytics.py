@@ -0,0 +1,93 @@
+"""Workload and fairness analytics over the columnar timetable.
+
+Both duty columns of a columnar.build_frame() frame are stacked into one
+long table of duties (teacher, type, date, slot); every figure below is a
+grouped operation on that table, with no loop over exams or teachers.
+"""
+import numpy as np
+import pandas as pd
+
+DUTY_TYPES = {"rev_teacher": "Revision", "inv_teacher": "Invigilation"}
+
+
+def duties(frame):
+    """One row per assigned duty: teacher, type, date, slot, class, id."""
+    df = frame.reset_index()
+    long = df.melt(
+        id_vars=["id", "date", "slot", "class"], value_vars=list(DUTY_TYPES),
+        var_name="type", value_name="teacher"
+    )
+    long["type"] = pd.Categorical(long["type"].map(DUTY_TYPES), categories=list(DUTY_TYPES.values()))
+    return long[long["teacher"].notna() & (long["teacher"] != "Unassigned")]
+
+
+def gini(values):
+    """0 = everyone has the same load, towards 1 = one teacher has it all."""
+    x = np.sort(np.asarray(values, dtype=float))
+    if not len(x) or not x.sum(): return 0.0
+    ranks = np.arange(1, len(x) + 1)
+    return float(2 * (ranks * x).sum() / (len(x) * x.sum()) - (len(x) + 1) / len(x))
+
+
+def max_consecutive_days(d):
+    """Longest run of consecutive exam days with at least one duty, per teacher."""
+    days = d[["teacher", "date"]].drop_duplicates()
+    # Exam days are numbered in calendar order, so a weekend or holiday does not break a run
+    day_no = pd.Series(range(d["date"].nunique()), index=sorted(d["date"].unique()))
+    days = days.assign(n=days["date"].map(day_no).to_numpy()).sort_values(["teacher", "n"])
+    run = days["n"] - days.groupby("teacher").cumcount()
+    return days.groupby(["teacher", run.to_numpy()]).size().groupby(level=0).max()
+
+
+def workload(frame, teacher_names):
+    """Returns a dict of tables and a summary, all computed from one duty table.
+
+    per_teacher: Revision, Invigilation, Total, Duty Days, Max Consecutive Days, Max per Day
+    by_date / by_slot: duty counts per teacher and exam date / slot
+    double_booked: teachers with more than one duty of a type in one slot
+    summary: spread of invigilation and total load across all teachers
+    """
+    d = duties(frame)
+    names = list(dict.fromkeys(list(teacher_names) + sorted(set(d["teacher"]))))
+
+    def counts(col):
+        return d.groupby(["teacher", col], observed=True).size().unstack(fill_value=0).reindex(names, fill_value=0).rename_axis("Teacher")
+
+    by_type = counts("type").reindex(columns=list(DUTY_TYPES.values()), fill_value=0)
+    by_date = counts("date")
+    by_slot = counts("slot")
+
+    per_teacher = by_type.assign(
+        Total=by_type.sum(axis=1),
+        **{
+            "Duty Days": (by_date > 0).sum(axis=1),
+            "Max Consecutive Days": max_consecutive_days(d).reindex(names, fill_value=0),
+            "Max per Day": by_date.max(axis=1) if not by_date.empty else 0,
+        }
+    )
+    per_teacher.columns.name = None
+    per_teacher = per_teacher.reset_index().sort_values(["Total", "Teacher"], ascending=[False, True])
+
+    key = ["teacher", "type", "date", "slot"]
+    clash = d[d.duplicated(key, keep=False)]
+    double_booked = clash.groupby(key, observed=True).agg(
+        Exams=("id", "size"), Classes=("class", lambda c: ", ".join(map(str, c)))
+    ).reset_index().rename(columns=str.title)
+
+    inv = per_teacher["Invigilation"]
+    total = per_teacher["Total"]
+    summary = {
+        "teachers": len(names),
+        "duties": int(total.sum()),
+        "gini_invigilation": round(gini(inv), 3),
+        "gini_total": round(gini(total), 3),
+        "gap_invigilation": int(inv.max() - inv.min()) if names else 0,
+        "gap_total": int(total.max() - total.min()) if names else 0,
+        "std_total": round(float(total.std(ddof=0)), 2) if names else 0.0,
+        "max_consecutive_days": int(per_teacher["Max Consecutive Days"].max()) if names else 0,
+        "double_booked": int(double_booked["Teacher"].nunique()),
+    }
+    return {
+        "per_teacher": per_teacher, "by_date": by_date, "by_slot": by_slot,
+        "double_booked": double_booked, "summary": summary,
+    }
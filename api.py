@@ -0,0 +1,232 @@
+"""Read-only HTTP/JSON API over the allocations.
+
+For notice boards and the staff portal, which only need to poll the current
+allocations and cannot afford the Streamlit UI. It reads the same SQLite
+storage through a SharedStore, so edits made in the app, the CLI or a
+background job show up on the next request.
+
+    python api.py --port 8502
+
+    GET /api/version
+    GET /api/dates
+    GET /api/allocations[?date=YYYY-MM-DD]       (default: today)
+    GET /api/teachers
+    GET /api/teachers/<name>/allocations[?date=]
+    GET /api/classes
+    GET /api/classes/<class>/allocations[?date=]
+
+Responses are cached per data version: a request only checks the stored
+version, and a repeated request is served from the cache. The ETag is a hash
+of the response body, so pollers sending If-None-Match get a 304 with no
+body until the data they asked for changes; writes to other data do not
+change it.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import scheduler as core
+import excel_export
+from shared_store import SharedStore
+from storage import Storage, DB_FILE
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def exam_record(ex, alloc):
+    return {
+        "id": ex["id"], "date": ex["date"], "slot": ex["slot"],
+        "class": ex["class"], "subject": ex["subject"],
+        "revision_teacher": alloc.get("rev_teacher") or "Unassigned",
+        "revision_periods": ex.get("rev_p", ""),
+        "invigilator": alloc.get("inv_teacher") or "Unassigned",
+        "exam_periods": ex.get("exam_p", ""),
+    }
+
+
+class AllocationIndex:
+    """Exam records of one Snapshot, grouped by date, teacher and class in one pass."""
+
+    def __init__(self, snap):
+        self.version = snap.version
+        self.classes = list(snap.ordered_classes)
+        self.teachers = core.get_all_teacher_names(snap.teachers)
+        self.by_date, self.by_teacher, self.by_class = {}, {}, {}
+        for ex in excel_export.sorted_exams(snap.timetable, snap.ordered_classes):
+            rec = exam_record(ex, snap.allocations.get(ex["id"], {}))
+            self.by_date.setdefault(rec["date"], []).append(rec)
+            self.by_class.setdefault(rec["class"], []).append(rec)
+            for duty, key in (("Revision", "revision_teacher"), ("Invigilation", "invigilator")):
+                if rec[key] != "Unassigned":
+                    self.by_teacher.setdefault(rec[key], []).append({"duty": duty, **rec})
+
+
+def _date_param(query, default=None):
+    value = query.get("date", [default])[0]
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ApiError(400, "date must be YYYY-MM-DD")
+
+
+def _on(records, day):
+    return records if day is None else [r for r in records if r["date"] == day]
+
+
+def route(index, path, query):
+    """The JSON payload for a GET of path; raises ApiError."""
+    parts = [unquote(p) for p in path.strip("/").split("/")]
+    if parts[:1] != ["api"]:
+        raise ApiError(404, "not found")
+    parts = parts[1:]
+    if parts == ["version"]:
+        return {"version": index.version}
+    if parts == ["dates"]:
+        return {"dates": list(index.by_date)}
+    if parts == ["allocations"]:
+        day = _date_param(query, date.today().isoformat())
+        return {"date": day, "allocations": index.by_date.get(day, [])}
+    if parts == ["teachers"]:
+        return {"teachers": index.teachers}
+    if parts == ["classes"]:
+        return {"classes": index.classes}
+    if len(parts) == 3 and parts[2] == "allocations" and parts[0] in ("teachers", "classes"):
+        kind, name = parts[0], parts[1]
+        if kind == "teachers":
+            if name not in index.by_teacher and name not in index.teachers:
+                raise ApiError(404, f"unknown teacher: {name}")
+            records = index.by_teacher.get(name, [])
+        else:
+            if name not in index.by_class and name not in index.classes:
+                raise ApiError(404, f"unknown class: {name}")
+            records = index.by_class.get(name, [])
+        day = _date_param(query)
+        return {kind[:-1]: name, "date": day, "allocations": _on(records, day)}
+    raise ApiError(404, "not found")
+
+
+MAX_CACHED = 1024
+
+
+class ResponseCache:
+    """Encoded responses of the current data version, keyed by path and query."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._index = None
+        self._responses = {}
+
+    def get(self, target):
+        """(status, etag, body) for a request target such as '/api/allocations?date=...'."""
+        snap = self.store.current()
+        today = date.today().isoformat()    # /api/allocations defaults to today
+        key = (target, today)
+        with self._lock:
+            if self._index is None or self._index.version != snap.version:
+                self._index = AllocationIndex(snap)
+                self._responses = {}
+            cached = self._responses.get(key)
+            index = self._index
+        if cached:
+            return cached
+
+        url = urlsplit(target)
+        try:
+            status, payload = 200, route(index, url.path, parse_qs(url.query))
+        except ApiError as e:
+            status, payload = e.status, {"error": str(e)}
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        # From the content only, so unrelated writes keep the ETag of this response
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        response = (status, etag, body)
+        with self._lock:
+            if self._index is index:
+                if len(self._responses) >= MAX_CACHED:
+                    self._responses.clear()
+                self._responses[key] = response
+        return response
+
+
+def etag_matches(header, etag):
+    """If-None-Match check: '*' or any listed tag equal to etag (weak comparison)."""
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    cache = None    # set by make_server
+
+    def _respond(self, send_body):
+        status, etag, body = self.cache.get(self.path)
+        if status == 200 and etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond(True)
+
+    def do_HEAD(self):
+        self._respond(False)
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+
+def make_server(storage, host="127.0.0.1", port=8502, verbose=False):
+    handler = type("Handler", (ApiHandler,), {"cache": ResponseCache(SharedStore(storage))})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Read-only JSON API for exam allocations.")
+    p.add_argument("--db", default=DB_FILE, help="SQLite database shared with the app")
+    p.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    p.add_argument("--port", type=int, default=8502)
+    p.add_argument("--verbose", action="store_true", help="log every request")
+    args = p.parse_args(argv)
+    if not os.path.exists(args.db):
+        p.error(f"{args.db} not found; run the app or cli.py --db first")
+
+    # No json_path: this server never imports or writes data
+    server = make_server(Storage(args.db, json_path=None), args.host, args.port, args.verbose)
+    print(f"Serving allocations on http://{args.host}:{server.server_port}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Benchmarks for the scheduler at several school sizes.
+
+Times each stage (schedule generation + assignment, candidate lookup,
+JSON and SQLite save/load, string sharing, the columnar frame with its
+matrix and views, stats) and reports wall time, throughput and peak
+traced memory. Use --json to append one line per stage and size, so runs
+can be compared over time.
+
+Example:
+    python benchmark.py --sizes 50 500 5000 --json bench_output.txt
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+import compact
+import scheduler as core
+import synthetic_school
+from storage import Storage
+
+START = date(2026, 11, 2)
+
+
+def stage_generate(ctx):
+    data = copy.deepcopy(ctx["base"])
+    core.build_schedule(data, START, 2)
+    ctx["data"] = data
+    return len(data["timetable"])
+
+
+def stage_candidates(ctx):
+    data = ctx["data"]
+    idx = core.build_teacher_index(data["teachers"])
+    graph = core.as_class_graph(core.get_ordered_classes(data["class_subjects"]))
+    for ex in data["timetable"]:
+        core.find_smart_invigilators(idx, graph, ex["class"], ex["subject"])
+    return len(data["timetable"])
+
+
+def _records(data):
+    return len(data["teachers"]) + len(data["timetable"]) + len(data["allocations"])
+
+
+def stage_json_save(ctx):
+    core.save_data(ctx["data"], os.path.join(ctx["tmp"], "data.json"))
+    return _records(ctx["data"])
+
+
+def stage_json_load(ctx):
+    return _records(core.load_data(os.path.join(ctx["tmp"], "data.json")))
+
+
+def stage_db_save(ctx):
+    with Storage(os.path.join(ctx["tmp"], "data.db"), json_path=None) as store:
+        store.replace_all(ctx["data"])
+    return _records(ctx["data"])
+
+
+def stage_db_load(ctx):
+    with Storage(os.path.join(ctx["tmp"], "data.db"), json_path=None) as store:
+        return _records(store.load_all())
+
+
+def stage_compact(ctx):
+    data = ctx["data"]
+    compact.share_strings({s: data[s] for s in ("teachers", "timetable", "allocations")})
+    return len(data["teachers"]) + len(data["allocations"])
+
+
+def stage_columnar(ctx):
+    import columnar
+    data = ctx["data"]
+    ordered = core.get_ordered_classes(data["class_subjects"])
+    frame = columnar.build_frame(data["timetable"], data["allocations"], ordered)
+    columnar.matrix(frame, ordered)
+    for d in columnar.dates(frame):
+        columnar.allocation_table(columnar.day_view(frame, d))
+    return len(data["timetable"])
+
+
+def stage_stats(ctx):
+    import analytics
+    import columnar
+    data = ctx["data"]
+    ordered = core.get_ordered_classes(data["class_subjects"])
+    frame = columnar.build_frame(data["timetable"], data["allocations"], ordered)
+    analytics.workload(frame, core.get_all_teacher_names(data["teachers"]))
+    return len(data["allocations"])
+
+
+STAGES = [
+    ("generate", stage_generate),
+    ("candidates", stage_candidates),
+    ("json_save", stage_json_save),
+    ("json_load", stage_json_load),
+    ("db_save", stage_db_save),
+    ("db_load", stage_db_load),
+    ("compact", stage_compact),
+    ("columnar", stage_columnar),
+    ("stats", stage_stats),
+]
+
+
+def measure(fn, ctx, repeat):
+    """Best wall time over `repeat` runs, then one traced run for peak memory."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        items = fn(ctx)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, items, peak
+
+
+def run(sizes, stages, repeat=3, mappings=3, classes=None, seed=0):
+    results = []
+    for n in sizes:
+        n_classes = classes or (None if n <= 320 else n // 20)
+        ctx = {"base": synthetic_school.make_school(n, n_classes, mappings_per_teacher=mappings, seed=seed)}
+        with tempfile.TemporaryDirectory() as tmp:
+            ctx["tmp"] = tmp
+            core.random.seed(seed)
+            stage_generate(ctx)  # every other stage needs a generated schedule
+            for name, fn in STAGES:
+                if name not in stages:
+                    continue
+                try:
+                    secs, items, peak = measure(fn, ctx, repeat)
+                except ImportError as e:
+                    print(f"{n:>6} {name:<11} skipped ({e.name} not installed)")
+                    continue
+                row = {
+                    "teachers": n, "classes": len(ctx["base"]["class_subjects"]), "stage": name,
+                    "seconds": round(secs, 6), "items": items,
+                    "items_per_sec": round(items / secs, 1) if secs else None,
+                    "peak_mib": round(peak / 2**20, 2),
+                }
+                results.append(row)
+                print(
+                    f"{n:>6} {name:<11} {secs * 1000:>10.1f} ms {row['items_per_sec'] or 0:>12,.0f} items/s"
+                    f" {row['peak_mib']:>9.2f} MiB"
+                )
+    return results
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark the exam scheduler.")
+    p.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000], help="numbers of teachers")
+    p.add_argument("--stages", nargs="+", choices=[s for s, _ in STAGES], default=[s for s, _ in STAGES])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--mappings", type=int, default=3, help="mappings per teacher")
+    p.add_argument("--classes", type=int, help="fixed number of classes (default scales with teachers)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json", help="append results as JSON lines to this file")
+    args = p.parse_args(argv)
+
+    print(f"{'size':>6} {'stage':<11} {'time':>13} {'throughput':>20} {'peak':>13}")
+    results = run(args.sizes, args.stages, args.repeat, args.mappings, args.classes, args.seed)
+
+    if args.json:
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(args.json, "a") as f:
+            for row in results:
+                f.write(json.dumps({"run": stamp, "python": platform.python_version(), **row}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
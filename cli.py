@@ -0,0 +1,127 @@
+"""Batch command line for the exam scheduler.
+
+Reads and writes the app's SQLite database, so schedules made here show up
+in the app and the other way round. --json works on a JSON data file
+instead, for one-off imports and exports.
+
+Example:
+    python cli.py --start 2026-11-02 --type unit --excel matrix_timetable.xlsx
+"""
+import argparse
+import sys
+from datetime import date
+
+import scheduler as core
+from storage import Storage, DB_FILE
+
+
+def tier(text):
+    value = int(text)
+    if not 1 <= value <= core.MAX_TIER:
+        raise argparse.ArgumentTypeError(f"must be from 1 to {core.MAX_TIER}")
+    return value
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Generate the exam timetable and invigilation allocations.")
+    p.add_argument("--db", default=DB_FILE, help="SQLite database shared with the app (default: %(default)s)")
+    p.add_argument("--json", help="read and write this JSON data file instead of the database")
+    p.add_argument("--out", help="with --json: JSON file to write (defaults to the --json file)")
+    p.add_argument("--start", required=True, type=date.fromisoformat, help="first exam date, YYYY-MM-DD")
+    p.add_argument("--type", choices=["unit", "terminal"], default="unit",
+                   help="unit = 2 exams/day, terminal = 1 exam/day")
+    p.add_argument("--excel", help="also write the matrix timetable to this .xlsx file")
+    p.add_argument("--workbook", help="also write the full multi-sheet workbook to this .xlsx file")
+    p.add_argument("--slips", help="also write one duty slip per teacher into this .zip file")
+    p.add_argument("--slips-format", choices=["xlsx", "html"], default="xlsx",
+                   help="duty slip format: Excel or printable HTML")
+    p.add_argument("--seed", type=int, help="random seed for reproducible allocations")
+    p.add_argument("--optimise", type=float, metavar="SECONDS",
+                   help="search for a better timetable within this time budget")
+    p.add_argument("--holiday", type=date.fromisoformat, action="append", default=[],
+                   help="date to skip when optimising (repeatable)")
+    p.add_argument("--max-days", type=int, help="cap on exam days when optimising")
+    p.add_argument("--pool", type=int, help="invigilators available per slot when optimising")
+    p.add_argument("--hard", action="append", default=[],
+                   help="subject that must not fall on consecutive days (repeatable)")
+    p.add_argument("--hops", type=tier,
+                   help="backup invigilators come from classes up to this many grades away "
+                        "(saved with the data; default: the saved value)")
+    p.add_argument("--sibling-tier", type=tier,
+                   help="backup tier of other streams of the same grade, e.g. Class 11 (MPC)/(BPC) "
+                        "(saved with the data; default: the saved value)")
+    args = p.parse_args(argv)
+    if args.out and not args.json:
+        p.error("--out only applies with --json")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.seed is not None:
+        core.random.seed(args.seed)
+
+    store = None
+    if args.json:
+        data = core.load_data(args.json)
+    else:
+        # An empty database imports the legacy JSON data file, as the app does
+        store = Storage(args.db)
+        data = store.load_all()
+    if not data["teachers"]:
+        print(f"No teachers found in {args.json or args.db}", file=sys.stderr)
+        return 1
+
+    slots_per_day = 2 if args.type == "unit" else 1
+    ordered = core.get_ordered_classes(data["class_subjects"])
+    # Tiers given here are saved, so the app re-solves this schedule under the same tiers
+    overrides = {k: v for k, v in (("hops", args.hops), ("sibling_tier", args.sibling_tier)) if v is not None}
+    data["settings"].update(overrides)
+    graph = core.as_class_graph(ordered, data["settings"])
+    if args.optimise:
+        import optimiser
+        data["timetable"], stats = optimiser.optimise_timetable(
+            data["class_subjects"], args.start, slots_per_day, ordered,
+            holidays=args.holiday, max_days=args.max_days, pool=args.pool,
+            hard_subjects=args.hard, time_budget=args.optimise, seed=args.seed
+        )
+        data["allocations"] = core.assign_all_exams(
+            data["timetable"], core.build_teacher_index(data["teachers"]), graph,
+            absent=core.build_absence_index(data["availability"])
+        )
+        print(f"Optimised: {stats['days']} days, peak {stats['peak']} per slot, "
+              f"{stats['violations']} violation(s), {stats['iterations']} moves")
+    else:
+        core.build_schedule(data, args.start, slots_per_day, graph)
+    if store:
+        with store:
+            with store.batch():
+                if overrides:
+                    store.save_settings(overrides)
+                store.replace_schedule(data["timetable"], data["allocations"])
+    else:
+        core.save_data(data, args.out or args.json)
+
+    unassigned = sum(1 for a in data["allocations"].values() if a["inv_teacher"] == "Unassigned")
+    print(f"{len(data['timetable'])} exams scheduled, {unassigned} without an invigilator")
+
+    if args.excel:
+        with open(args.excel, "wb") as f:
+            import columnar
+            frame = columnar.build_frame(data["timetable"], data["allocations"], ordered)
+            f.write(core.convert_df_to_excel(columnar.matrix(frame, ordered)))
+        print(f"Matrix written to {args.excel}")
+    if args.workbook:
+        import excel_export
+        excel_export.write_workbook(data, args.workbook)
+        print(f"Workbook written to {args.workbook}")
+    if args.slips:
+        import duty_slips
+        with open(args.slips, "wb") as f:
+            f.write(duty_slips.build_slips_zip(data, args.slips_format))
+        print(f"Duty slips written to {args.slips}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
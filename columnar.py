@@ -0,0 +1,75 @@
+"""Columnar view of the timetable and its allocations.
+
+build_frame() joins the exam and allocation dicts into one DataFrame with
+categorical class, subject and slot columns (classes in school order),
+indexed and sorted by date. Per-date views, the allocation table and the
+matrix pivot are then vectorised operations on that frame instead of
+loops over every exam. The frame is derived data, rebuilt once per data
+version; the dicts stay what is stored and edited.
+"""
+import pandas as pd
+
+import scheduler as core
+
+EXAM_COLUMNS = ["id", "date", "class", "subject", "slot"]
+
+
+def build_frame(timetable, allocations, ordered_classes):
+    df = pd.DataFrame.from_records(timetable, columns=EXAM_COLUMNS)
+    alloc = pd.DataFrame({
+        "rev_teacher": [a.get("rev_teacher") for a in allocations.values()],
+        "inv_teacher": [a.get("inv_teacher") for a in allocations.values()],
+    }, index=pd.Index(list(allocations), dtype=object))
+
+    classes = list(ordered_classes)
+    classes += sorted(set(df["class"]) - set(classes))
+    df["class"] = pd.Categorical(df["class"], categories=classes, ordered=True)
+    df["subject"] = df["subject"].astype("category")
+    df["slot"] = pd.Categorical(df["slot"], categories=list(core.SLOT_PERIODS), ordered=True)
+    df = df.join(alloc, on="id")
+    df[["rev_teacher", "inv_teacher"]] = df[["rev_teacher", "inv_teacher"]].fillna("Unassigned")
+    return df.sort_values(["date", "slot", "class"], kind="stable").set_index("date")
+
+
+def dates(frame):
+    return list(frame.index.unique())
+
+
+def day_view(frame, date):
+    """All exams on one date; a slice of the sorted date index, no scan."""
+    return frame.loc[[date]] if date in frame.index else frame.iloc[0:0]
+
+
+def day_records(day):
+    """Exam dicts (id, date, class, subject, slot) for a day_view."""
+    return day.reset_index()[EXAM_COLUMNS].astype(str).to_dict("records")
+
+
+def allocation_table(day):
+    """One row per exam of the day, sorted by class order."""
+    day = day.sort_values("class", kind="stable")
+    return pd.DataFrame({
+        "Class": day["class"],
+        "Exam": day["subject"].astype(str) + " (" + day["slot"].astype(str) + ")",
+        "Revision Teacher": day["rev_teacher"],
+        "Invigilator": day["inv_teacher"],
+    }).reset_index(drop=True)
+
+
+def matrix(frame, ordered_classes):
+    """Rows = dates, columns = classes, cells = 'Subject (M)' / 'Subject (A)'."""
+    codes = {slot: "(M)" if "Morning" in slot else "(A)" for slot in core.SLOT_PERIODS}
+    cells = frame["subject"].astype(str) + " " + frame["slot"].astype(str).map(codes)
+    cells.index = pd.MultiIndex.from_arrays([frame.index, frame["class"].astype(str)])
+    # The frame is sorted by slot within each date, so the n-th exam of a
+    # class on a day is appended to its cell in the n-th round
+    nth = cells.groupby(level=[0, 1], sort=False).cumcount().to_numpy()
+    joined = cells[nth == 0]
+    for n in range(1, nth.max(initial=0) + 1):
+        more = cells[nth == n]
+        joined.loc[more.index] = joined.loc[more.index] + "\n" + more
+    grid = joined.unstack()
+    grid = grid.reindex(columns=[c for c in ordered_classes if c in grid.columns])
+    grid.index.name = "Date"
+    grid.columns.name = None
+    return grid.sort_index()
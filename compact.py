@@ -0,0 +1,41 @@
+"""Shared strings for the in-memory data.
+
+The JSON layout repeats every teacher, class and subject name in each
+mapping and allocation, and every allocation carries its own list of
+candidate names. share_strings() interns those names and lets allocations
+with the same candidates share one list, so the snapshot the app serves
+holds each of them once while keeping the dict layout every module reads.
+"""
+import sys
+
+
+def share_strings(sections):
+    """Interns names in the given sections in place and makes allocations with
+    equal candidate lists share one list object. Returns sections.
+
+    Shared lists must be replaced, never modified in place; every code path
+    in scheduler.py already builds a new allocation when one changes.
+    """
+    intern = sys.intern
+    for t in sections.get("teachers", ()):
+        t["name"] = intern(t["name"])
+        for m in t.get("mappings", []):
+            m["class"] = intern(m["class"])
+            m["subject"] = intern(m["subject"])
+    for ex in sections.get("timetable", ()):
+        for k in ("id", "date", "class", "subject", "slot"):
+            if isinstance(ex.get(k), str):
+                ex[k] = intern(ex[k])
+    allocations = sections.get("allocations")
+    if allocations:
+        shared = {}
+        for eid in list(allocations):
+            a = allocations[eid]
+            for k in ("rev_teacher", "inv_teacher"):
+                if isinstance(a.get(k), str):
+                    a[k] = intern(a[k])
+            cands = a.get("backup_invs")
+            if cands:
+                key = tuple(cands)
+                a["backup_invs"] = shared.setdefault(key, [intern(n) for n in key])
+    return sections
@@ -0,0 +1,136 @@
+"""Per-teacher duty slips, exported together as one zip.
+
+Duties are collected in one pass over the sorted exams
+(excel_export.group_duties). Each teacher's slip is then rendered as a
+small .xlsx file or a printable .html page. The rendering runs in batches
+on a process pool; small exports are rendered in this process, because
+starting the workers would take longer than the work.
+"""
+import html
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import xlsxwriter
+
+import scheduler as core
+import excel_export
+
+FORMATS = ("xlsx", "html")
+SLIP_HEADER = ["Date", "Day", "Slot", "Duty", "Class", "Subject", "Periods"]
+INLINE_LIMIT = 40    # slips rendered without a process pool
+BATCH = 25           # slips per worker task
+
+HTML_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title} - {name}</title>
+<style>
+  body {{ font-family: 'Segoe UI', Arial, sans-serif; margin: 2em; color: #000; }}
+  h1 {{ font-size: 1.4em; margin-bottom: 0; }}
+  h2 {{ font-size: 1.1em; font-weight: normal; margin-top: 0.3em; }}
+  table {{ border-collapse: collapse; width: 100%; margin-top: 1em; }}
+  th, td {{ border: 1px solid #444; padding: 4px 8px; text-align: left; }}
+  th {{ background: #eee; }}
+  .sign {{ margin-top: 3em; }}
+  @media print {{ body {{ margin: 0; }} }}
+</style></head>
+<body>
+<h1>{title}</h1>
+<h2>{name} &mdash; {summary}</h2>
+{table}
+<p class="sign">Signature: ______________________</p>
+</body></html>
+"""
+
+
+def _rows(duties):
+    """Duty rows from group_duties with the weekday added after the date."""
+    return [[d[0], date.fromisoformat(d[0]).strftime("%a")] + d[1:] for d in duties]
+
+
+def _summary(rows):
+    revs = sum(1 for r in rows if r[3] == "Revision")
+    return f"{revs} revision, {len(rows) - revs} invigilation duties"
+
+
+def render_xlsx(name, rows, title):
+    output = io.BytesIO()
+    wb = xlsxwriter.Workbook(output, {"in_memory": True})
+    bold = wb.add_format({"bold": True})
+    ws = wb.add_worksheet("Duties")
+    ws.set_column(0, len(SLIP_HEADER) - 1, 14)
+    ws.write(0, 0, title, wb.add_format({"bold": True, "font_size": 14}))
+    ws.write(1, 0, f"{name} - {_summary(rows)}")
+    ws.write_row(3, 0, SLIP_HEADER, bold)
+    for r, row in enumerate(rows, start=4):
+        ws.write_row(r, 0, row)
+    ws.write(len(rows) + 6, 0, "Signature:")
+    ws.fit_to_pages(1, 0)
+    wb.close()
+    return output.getvalue()
+
+
+def render_html(name, rows, title):
+    if rows:
+        head = "".join(f"<th>{h}</th>" for h in SLIP_HEADER)
+        body = "".join(
+            "<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in row) + "</tr>" for row in rows
+        )
+        table = f"<table><tr>{head}</tr>{body}</table>"
+    else:
+        table = "<p>No duties assigned.</p>"
+    return HTML_PAGE.format(
+        title=html.escape(title), name=html.escape(name), summary=_summary(rows), table=table
+    ).encode("utf-8")
+
+
+RENDERERS = {"xlsx": render_xlsx, "html": render_html}
+
+
+def _render_batch(fmt, title, batch):
+    render = RENDERERS[fmt]
+    return [(name, render(name, rows, title)) for name, rows in batch]
+
+
+def file_name(name, used, fmt):
+    base = re.sub(r"[^\w\- .]", "_", name).strip(" .") or "teacher"
+    candidate, n = base, 1
+    while candidate.lower() in used:
+        n += 1
+        candidate = f"{base} ({n})"
+    used.add(candidate.lower())
+    return f"{candidate}.{fmt}"
+
+
+def _pool_context():
+    # Forking a threaded process (e.g. the Streamlit server) can deadlock
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def build_slips_zip(data, fmt="xlsx", title="Exam Duty Slip", workers=None):
+    """Zip bytes with one slip per teacher (teachers without duties included)."""
+    if fmt not in RENDERERS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    ordered = core.get_ordered_classes(data["class_subjects"])
+    duties = excel_export.group_duties(excel_export.sorted_exams(data["timetable"], ordered), data["allocations"])
+    jobs = [(name, _rows(duties.get(name, []))) for name in core.get_all_teacher_names(data["teachers"])]
+    batches = [jobs[i:i + BATCH] for i in range(0, len(jobs), BATCH)]
+
+    workers = workers or min(len(batches), os.cpu_count() or 1)
+    if len(jobs) <= INLINE_LIMIT or workers <= 1:
+        rendered = [_render_batch(fmt, title, b) for b in batches]
+    else:
+        with ProcessPoolExecutor(workers, mp_context=_pool_context()) as pool:
+            rendered = list(pool.map(_render_batch, [fmt] * len(batches), [title] * len(batches), batches))
+
+    output = io.BytesIO()
+    used = set()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zf:
+        for batch in rendered:
+            for name, content in batch:
+                zf.writestr(file_name(name, used, fmt), content)
+    return output.getvalue()
@@ -0,0 +1,136 @@
+"""Multi-sheet Excel export.
+
+One workbook with the matrix timetable, the full allocation register, one
+duty sheet per teacher and the stats. XlsxWriter runs in constant-memory
+mode, which flushes each row to a temp file as soon as the next row starts,
+so every sheet is written strictly top to bottom.
+"""
+import io
+import re
+
+import xlsxwriter
+
+import scheduler as core
+
+REGISTER_HEADER = [
+    "Date", "Slot", "Class", "Subject", "Revision Periods", "Exam Periods",
+    "Revision Teacher", "Invigilator", "Backups"
+]
+DUTY_HEADER = ["Date", "Slot", "Duty", "Class", "Subject", "Periods"]
+STATS_HEADER = ["Teacher", "Revisions", "Invigilations", "Total"]
+
+
+def sorted_exams(timetable, ordered_classes):
+    pos = {c: i for i, c in enumerate(ordered_classes)}
+    return sorted(
+        timetable,
+        key=lambda ex: (ex['date'], core.SLOT_ORDER.get(ex['slot'], 99), pos.get(ex['class'], len(pos)))
+    )
+
+
+def group_duties(exams, allocations):
+    """One pass over the exams: teacher -> duty rows, in exam order."""
+    duties = {}
+    for ex in exams:
+        alloc = allocations.get(ex['id'], {})
+        rev = alloc.get('rev_teacher')
+        inv = alloc.get('inv_teacher')
+        if rev and rev != "Unassigned":
+            duties.setdefault(rev, []).append(
+                [ex['date'], ex['slot'], "Revision", ex['class'], ex['subject'], ex.get('rev_p', "")]
+            )
+        if inv and inv != "Unassigned":
+            duties.setdefault(inv, []).append(
+                [ex['date'], ex['slot'], "Invigilation", ex['class'], ex['subject'], ex.get('exam_p', "")]
+            )
+    return duties
+
+
+def sheet_name(name, used):
+    """Excel sheet names: max 31 chars, no []:*?/\\ and unique (case-insensitive)."""
+    base = re.sub(r"[\[\]:*?/\\]", "_", name).strip("'")[:31] or "Teacher"
+    candidate, n = base, 1
+    while candidate.lower() in used:
+        n += 1
+        suffix = f" ({n})"
+        candidate = base[:31 - len(suffix)] + suffix
+    used.add(candidate.lower())
+    return candidate
+
+
+def _write_rows(ws, header, rows, bold):
+    ws.write_row(0, 0, header, bold)
+    r = 0
+    for r, row in enumerate(rows, start=1):
+        ws.write_row(r, 0, row)
+    ws.autofilter(0, 0, max(r, 1), len(header) - 1)
+    ws.freeze_panes(1, 0)
+
+
+def write_workbook(data, target):
+    """Writes the full workbook to a path or binary file object."""
+    ordered = core.get_ordered_classes(data["class_subjects"])
+    exams = sorted_exams(data["timetable"], ordered)
+    allocations = data["allocations"]
+
+    wb = xlsxwriter.Workbook(target, {"constant_memory": True})
+    bold = wb.add_format({"bold": True})
+    wrap = wb.add_format({"text_wrap": True, "valign": "top"})
+
+    # --- Matrix: rows = dates, columns = classes ---
+    ws = wb.add_worksheet("Matrix")
+    present = {ex['class'] for ex in exams}
+    cols = [c for c in ordered if c in present] + sorted(present.difference(ordered))
+    col_of = {c: i + 1 for i, c in enumerate(cols)}
+    ws.write_row(0, 0, ["Date"] + cols, bold)
+    ws.set_column(1, len(cols), 18)
+    ws.freeze_panes(1, 1)
+    r = 0
+    for date, day in core.group_by_date(exams).items():
+        r += 1
+        cells = {}
+        for ex in day:
+            code = "(M)" if "Morning" in ex['slot'] else "(A)"
+            cells.setdefault(ex['class'], []).append(f"{ex['subject']} {code}")
+        ws.write(r, 0, date)
+        for c in sorted(cells, key=col_of.get):
+            ws.write(r, col_of[c], "\n".join(cells[c]), wrap)
+
+    # --- Allocation register ---
+    ws = wb.add_worksheet("Allocations")
+    ws.set_column(0, len(REGISTER_HEADER) - 1, 16)
+    _write_rows(ws, REGISTER_HEADER, (
+        [
+            ex['date'], ex['slot'], ex['class'], ex['subject'], ex.get('rev_p', ""), ex.get('exam_p', ""),
+            a.get('rev_teacher', "Unassigned"), a.get('inv_teacher', "Unassigned"),
+            ", ".join(a.get('backup_invs', []))
+        ]
+        for ex in exams for a in [allocations.get(ex['id'], {})]
+    ), bold)
+
+    # --- Stats ---
+    duties = group_duties(exams, allocations)
+    ws = wb.add_worksheet("Stats")
+    ws.set_column(0, 0, 24)
+    stats = []
+    for name in core.get_all_teacher_names(data["teachers"]):
+        rows = duties.get(name, [])
+        revs = sum(1 for d in rows if d[2] == "Revision")
+        stats.append([name, revs, len(rows) - revs, len(rows)])
+    stats.sort(key=lambda row: (-row[3], row[0]))
+    _write_rows(ws, STATS_HEADER, stats, bold)
+
+    # --- One duty sheet per teacher ---
+    used = {"matrix", "allocations", "stats"}
+    for name in core.get_all_teacher_names(data["teachers"]):
+        ws = wb.add_worksheet(sheet_name(name, used))
+        ws.set_column(0, len(DUTY_HEADER) - 1, 14)
+        _write_rows(ws, DUTY_HEADER, duties.get(name, []), bold)
+
+    wb.close()
+
+
+def workbook_bytes(data):
+    output = io.BytesIO()
+    write_workbook(data, output)
+    return output.getvalue()
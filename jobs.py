@@ -0,0 +1,143 @@
+"""Background schedule generation.
+
+A Job runs on a worker thread and is kept in a process-wide registry, so
+it survives Streamlit reruns and can be polled from any session. The
+worker reports progress through Job.report(), which is also where a
+cancel request takes effect. The finished schedule is written with one
+storage transaction, so other sessions see either the old or the new
+schedule, never a mix.
+"""
+import copy
+import threading
+import time
+import uuid
+
+import scheduler as core
+
+_JOBS = {}
+_lock = threading.Lock()
+KEEP_FINISHED = 20
+
+
+class JobRunning(Exception):
+    """Raised by submit(exclusive=True) while a job with the same label runs."""
+
+    def __init__(self, job):
+        super().__init__(f"{job.label} is already running")
+        self.job = job
+
+
+class Job:
+    def __init__(self, label, fn):
+        self.id = uuid.uuid4().hex[:8]
+        self.label = label
+        self.status = "running"     # running | done | cancelled | failed
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+        self._fn = fn
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"job-{self.id}", daemon=True)
+
+    def _run(self):
+        try:
+            result = self._fn(self)
+            status, error = "done", None
+        except core.Cancelled:
+            result, status, error = None, "cancelled", None
+        except Exception as e:
+            result, status, error = None, "failed", str(e)
+        with self._lock:
+            self.result, self.status, self.error = result, status, error
+            self.finished = time.time()
+
+    def report(self, **fields):
+        """Progress hook for the worker; raises Cancelled once cancel() was called."""
+        if self._cancel.is_set():
+            raise core.Cancelled()
+        with self._lock:
+            self.progress.update(fields)
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def running(self):
+        return self.status == "running"
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "id": self.id, "label": self.label, "status": self.status,
+                "progress": dict(self.progress), "result": self.result, "error": self.error,
+                "elapsed": (self.finished or time.time()) - self.started,
+            }
+
+
+def submit(label, fn, exclusive=False):
+    """Starts fn(job) on a worker thread and returns the Job.
+
+    With exclusive=True, raises JobRunning instead if a job with this label
+    is running in any session; the check and the start are one step.
+    """
+    job = Job(label, fn)
+    with _lock:
+        if exclusive:
+            other = _running(label)
+            if other is not None:
+                raise JobRunning(other)
+        finished = [j for j in _JOBS.values() if not j.running]
+        for j in sorted(finished, key=lambda j: j.finished)[:max(0, len(finished) - KEEP_FINISHED)]:
+            del _JOBS[j.id]
+        _JOBS[job.id] = job
+    job._thread.start()
+    return job
+
+
+def get(job_id):
+    return _JOBS.get(job_id)
+
+
+def _running(label):
+    return next((j for j in _JOBS.values() if j.label == label and j.running), None)
+
+
+def running(label):
+    """The running job with this label, from any session, or None."""
+    with _lock:
+        return _running(label)
+
+
+def schedule_job(store, class_subjects, teachers, start_date, slots_per_day, optimise=None, availability=(),
+                 settings=None):
+    """Job body: generate (or optimise) the timetable, assign invigilators, commit.
+
+    Works on private copies of class_subjects, teachers and availability so
+    sessions can keep editing while it runs. optimise is a dict of optimise_timetable
+    keyword arguments, or None for the standard layout. settings holds the
+    backup tiers (core.DEFAULT_SETTINGS if None).
+    """
+    class_subjects = copy.deepcopy(class_subjects)
+    teachers = copy.deepcopy(teachers)
+    settings = dict(settings or {})
+    absent = core.build_absence_index(availability)
+
+    def run(job):
+        ordered = core.get_ordered_classes(class_subjects)
+        idx = core.build_teacher_index(teachers)
+        stats = None
+        if optimise is not None:
+            import optimiser
+            timetable, stats = optimiser.optimise_timetable(
+                class_subjects, start_date, slots_per_day, ordered, progress=job.report, **optimise
+            )
+        else:
+            timetable = core.generate_timetable(class_subjects, start_date, slots_per_day, ordered, job.report)
+        allocations = core.assign_all_exams(timetable, idx, core.as_class_graph(ordered, settings), job.report, absent)
+        job.report(stage="saving")
+        store.replace_schedule(timetable, allocations)
+        return {"exams": len(timetable), "optimiser": stats}
+    return run
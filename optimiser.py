@@ -0,0 +1,176 @@
+"""Constraint-based exam timetable optimiser.
+
+Starts from the standard layout (the n-th subject of every class in the
+n-th slot) mapped onto the working days, then runs simulated annealing
+within a fixed time budget and returns the best timetable found.
+
+Hard constraints (heavily penalised):
+  - no day past the cap on exam days
+  - no more exams in a slot than the shared invigilator pool
+  - no two hard subjects for a class on the same or consecutive exam days
+Objective: fewest exam days (span), then lowest peak exams per slot.
+Holidays and Sundays are never used. A class never sits two exams in one slot.
+"""
+import math
+import random
+import time
+from datetime import timedelta
+
+import scheduler as core
+
+PENALTY = 1000
+SLOTS = list(core.SLOT_PERIODS)
+
+
+def working_days(start_date, n, holidays=()):
+    holidays = set(holidays)
+    days = []
+    d = start_date
+    while len(days) < n:
+        if d.weekday() != 6 and d not in holidays:
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+class _State:
+    """Slot assignment per class plus running aggregates for O(1)-ish cost updates."""
+
+    def __init__(self, problem, placement):
+        self.p = problem
+        self.place = [list(row) for row in placement]   # class -> slot per subject
+        self.slot_count = [0] * problem.n_slots
+        self.peak_hist = {}
+        self.day_count = [0] * problem.n_days
+        for row in self.place:
+            for s in row:
+                self._add(s, 1)
+        self.hard_viol = [self._class_hard(c) for c in range(len(self.place))]
+
+    def _add(self, s, step):
+        old = self.slot_count[s]
+        if old: self.peak_hist[old] -= 1
+        self.slot_count[s] = old + step
+        if old + step: self.peak_hist[old + step] = self.peak_hist.get(old + step, 0) + 1
+        self.day_count[s // self.p.spd] += step
+
+    def _class_hard(self, c):
+        days = sorted(self.place[c][i] // self.p.spd for i in self.p.hard_idx[c])
+        return sum(1 for a, b in zip(days, days[1:]) if b - a <= 1)
+
+    def peak(self):
+        return max((k for k, v in self.peak_hist.items() if v), default=0)
+
+    def span(self):
+        for d in range(self.p.n_days - 1, -1, -1):
+            if self.day_count[d]: return d + 1
+        return 0
+
+    def cost(self):
+        p = self.p
+        span = self.span()
+        peak = self.peak()
+        viol = sum(self.hard_viol)
+        viol += max(0, span - p.max_days) if p.max_days else 0
+        viol += sum(max(0, n - p.pool) for n in self.slot_count) if p.pool else 0
+        return viol * PENALTY + span * p.w_days + peak * p.w_peak, viol, span, peak
+
+    def move(self, c, i, s):
+        old = self.place[c][i]
+        self._add(old, -1)
+        self._add(s, 1)
+        self.place[c][i] = s
+        self.hard_viol[c] = self._class_hard(c)
+        return old
+
+    def swap(self, c, i, j):
+        row = self.place[c]
+        row[i], row[j] = row[j], row[i]
+        self.hard_viol[c] = self._class_hard(c)
+
+
+class _Problem:
+    def __init__(self, classes, class_subjects, spd, n_days, max_days, pool, hard, w_days, w_peak):
+        self.classes = classes
+        self.subjects = [class_subjects[c] for c in classes]
+        self.spd = spd
+        self.n_days = n_days
+        self.n_slots = n_days * spd
+        self.max_days = max_days
+        self.pool = pool
+        self.hard_idx = [[i for i, s in enumerate(subs) if s in hard] for subs in self.subjects]
+        self.w_days = w_days
+        self.w_peak = w_peak
+
+
+def optimise_timetable(class_subjects, start_date, slots_per_day, ordered_classes=None,
+                       holidays=(), max_days=None, pool=None, hard_subjects=(),
+                       time_budget=5.0, seed=None, w_days=10, w_peak=2, progress=None):
+    """Returns (timetable, stats). stats has cost, violations, days, peak, iterations, improved.
+
+    pool: invigilators available per slot (None = unlimited).
+    The best solution so far is returned when time_budget seconds run out.
+    progress is called periodically as progress(stage=..., elapsed=..., budget=..., best_cost=...).
+    """
+    rng = random.Random(seed)
+    classes = ordered_classes or core.get_ordered_classes(class_subjects)
+    max_subs = max((len(class_subjects[c]) for c in classes), default=0)
+    greedy_days = math.ceil(max_subs / slots_per_day)
+    n_days = max(greedy_days + len(set(hard_subjects)) + 2, max_days or 0)
+
+    problem = _Problem(classes, class_subjects, slots_per_day, n_days, max_days, pool,
+                       set(hard_subjects), w_days, w_peak)
+    # Greedy start: subject i of every class in slot i
+    state = _State(problem, [list(range(len(subs))) for subs in problem.subjects])
+    cur_cost, *_ = state.cost()
+    start_cost = cur_cost
+    best = ([row[:] for row in state.place], state.cost())
+
+    movable = [c for c, subs in enumerate(problem.subjects) if subs]
+    deadline = time.perf_counter() + time_budget
+    temp0 = max(1.0, cur_cost * 0.05)
+    it = 0
+    while movable:
+        if it % 256 == 0:
+            now = time.perf_counter()
+            if now >= deadline: break
+            temp = temp0 * max(1e-3, (deadline - now) / time_budget)
+            if progress and it % 8192 == 0:
+                progress(stage="optimising", elapsed=time_budget - (deadline - now),
+                         budget=time_budget, best_cost=best[1][0])
+        it += 1
+        c = rng.choice(movable)
+        row = state.place[c]
+        i = rng.randrange(len(row))
+        if len(row) > 1 and rng.random() < 0.3:
+            j = rng.randrange(len(row))
+            if i == j: continue
+            state.swap(c, i, j)
+            undo = lambda: state.swap(c, i, j)
+        else:
+            s = rng.randrange(problem.n_slots)
+            if s in row: continue
+            old = state.move(c, i, s)
+            undo = lambda: state.move(c, i, old)
+        new_cost, *_ = state.cost()
+        delta = new_cost - cur_cost
+        if delta <= 0 or rng.random() < math.exp(-delta / temp):
+            cur_cost = new_cost
+            if new_cost < best[1][0]:
+                best = ([r[:] for r in state.place], state.cost())
+        else:
+            undo()
+
+    days = working_days(start_date, n_days, holidays)
+    timetable = []
+    for c, cls in enumerate(classes):
+        for i, s in enumerate(best[0][c]):
+            timetable.append(core.make_exam(days[s // slots_per_day], cls, problem.subjects[c][i], SLOTS[s % slots_per_day]))
+    pos = {cls: c for c, cls in enumerate(classes)}
+    timetable.sort(key=lambda ex: (ex['date'], core.SLOT_ORDER[ex['slot']], pos[ex['class']]))
+
+    cost, viol, span, peak = best[1]
+    return timetable, {
+        "cost": cost, "violations": viol, "days": span, "peak": peak,
+        "iterations": it, "improved": cost < start_cost,
+    }
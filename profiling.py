@@ -0,0 +1,87 @@
+"""Optional per-rerun timing of named app stages.
+
+Enable with the environment variable EXAM_PROFILE=1 or the URL query
+parameter ?profile=1. Set EXAM_PROFILE_LOG to a path to also append every
+run as a JSON line. When disabled, NULL_PROFILER hands out one shared
+no-op context manager, so the hooks cost a method call each.
+"""
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+_NOOP = nullcontext()
+_log_lock = threading.Lock()
+
+
+class NullProfiler:
+    enabled = False
+
+    def begin(self, label): pass
+    def end(self): pass
+    def stage(self, name): return _NOOP
+    def run(self, label): return _NOOP
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self, keep=20, log_path=None):
+        self.history = deque(maxlen=keep)
+        self.log_path = log_path
+        self.current = None
+
+    def begin(self, label):
+        """Starts a run record; an unfinished previous run (e.g. cut short by st.rerun) is kept."""
+        if self.current is not None:
+            self.end(interrupted=True)
+        self.current = {"label": label, "started": time.time(), "t0": time.perf_counter(), "stages": {}}
+        self.current["last"] = self.current["t0"]
+
+    def end(self, interrupted=False):
+        run, self.current = self.current, None
+        if run is None: return
+        record = {
+            "label": run["label"] + (" (interrupted)" if interrupted else ""),
+            "time": time.strftime("%H:%M:%S", time.localtime(run["started"])),
+            # An interrupted run ends with its last finished stage, not when the next run starts
+            "total_ms": round(((run["last"] if interrupted else time.perf_counter()) - run["t0"]) * 1000, 2),
+            **{k: round(v, 2) for k, v in run["stages"].items()},
+        }
+        self.history.append(record)
+        if self.log_path:
+            with _log_lock, open(self.log_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.current is not None:
+                now = time.perf_counter()
+                stages = self.current["stages"]
+                stages[name] = stages.get(name, 0) + (now - t0) * 1000
+                self.current["last"] = now
+
+    @contextmanager
+    def run(self, label):
+        """A stage inside a full run, or a run of its own for a partial (fragment) rerun."""
+        if self.current is not None:
+            with self.stage(label):
+                yield
+            return
+        self.begin(label)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def records(self):
+        """Most recent first."""
+        return list(reversed(self.history))
+
+
+NULL_PROFILER = NullProfiler()
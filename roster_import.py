@@ -0,0 +1,76 @@
+"""Bulk teacher roster import.
+
+A roster has one row per (teacher, class, subject). All rows are checked
+in one vectorised pass against the class/subject lists; valid rows are
+grouped into teacher records ready to be saved in a single write.
+"""
+import pandas as pd
+
+COLUMNS = ["teacher", "class", "subject"]
+ALIASES = {"name": "teacher", "teacher name": "teacher", "classes": "class", "subjects": "subject"}
+
+
+def read_roster(fileobj, filename):
+    """Reads a .csv or .xlsx roster. Raises ValueError if required columns are missing."""
+    if filename.lower().endswith((".xlsx", ".xls")):
+        try:
+            df = pd.read_excel(fileobj, dtype=str)
+        except ImportError as e:
+            raise ValueError(f"Reading Excel files needs {e.name}; upload a CSV instead")
+    else:
+        df = pd.read_csv(fileobj, dtype=str)
+
+    df.columns = [ALIASES.get(c, c) for c in df.columns.str.strip().str.lower()]
+    missing = [c for c in COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    return df[COLUMNS]
+
+
+def validate_roster(df, class_subjects, teachers=()):
+    """Splits the roster into (valid rows, rows with a 'Problem' column).
+
+    Flags blanks, unknown classes, unknown subjects, subjects not taught in
+    that class, duplicates within the file and mappings a teacher already has.
+    """
+    df = df.fillna("").apply(lambda col: col.str.strip())
+    pairs = pd.DataFrame(
+        [(c, s) for c, subs in class_subjects.items() for s in subs], columns=["class", "subject"]
+    ).drop_duplicates()
+    existing = pd.DataFrame(
+        [(t["name"], m["class"], m["subject"]) for t in teachers for m in t.get("mappings", [])],
+        columns=COLUMNS
+    ).drop_duplicates()
+
+    blank = (df[COLUMNS] == "").any(axis=1)
+    known_class = df["class"].isin(pairs["class"])
+    known_subject = df["subject"].isin(pairs["subject"])
+    offered = df.merge(pairs.assign(_offered=True), on=["class", "subject"], how="left")["_offered"].notna()
+    already = df.merge(existing.assign(_have=True), on=COLUMNS, how="left")["_have"].notna()
+    duplicate = df.duplicated(COLUMNS, keep="first")
+
+    problem = pd.Series("", index=df.index)
+    # Later checks only apply where no earlier problem was found
+    for mask, text in [
+        (blank, "Blank teacher, class or subject"),
+        (~known_class.values, "Unknown class"),
+        (~known_subject.values, "Unknown subject"),
+        (~offered.values, "Subject not taught in this class"),
+        (duplicate.values, "Duplicate row"),
+        (already.values, "Teacher already has this mapping"),
+    ]:
+        problem = problem.mask((problem == "") & mask, text)
+
+    ok = problem == ""
+    return df[ok], df[~ok].assign(Problem=problem[~ok])
+
+
+def roster_to_teachers(valid, teachers=()):
+    """Teacher records for every name in the roster; existing teachers keep their mappings."""
+    current = {t["name"]: t.get("mappings", []) for t in teachers}
+    out = []
+    for name, rows in valid.groupby("teacher", sort=False):
+        mappings = list(current.get(name, []))
+        mappings += rows[["class", "subject"]].to_dict("records")
+        out.append({"name": name, "mappings": mappings})
+    return out
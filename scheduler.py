@@ -0,0 +1,647 @@
+"""Headless scheduling core.
+
+Everything here works on the plain data stored in the JSON data file
+(lists of teacher/exam dicts, an allocations dict and class_subjects),
+so schedules can be generated from scripts without Streamlit.
+"""
+import gzip
+import io
+import json
+import os
+import random
+import uuid
+from datetime import date, timedelta
+from functools import lru_cache
+
+DATA_FILE = "school_data_v6.json"
+
+# slot name -> (revision periods, exam periods)
+SLOT_PERIODS = {
+    "Morning": ("1st-2nd", "3rd-4th"),
+    "Afternoon": ("5th-6th", "7th-8th"),
+}
+
+
+# Backup tiers of the class graph (see ClassGraph), saved with the data
+DEFAULT_SETTINGS = {"hops": 1, "sibling_tier": 1}
+MAX_TIER = 12
+
+
+class Cancelled(Exception):
+    """Raised from a progress callback to stop a long-running generation."""
+
+# ==========================================
+# DATA
+# ==========================================
+def get_default_subjects():
+    base = {
+        "Class 1": ["EVS", "English", "Telugu", "EHV", "Maths"],
+        "Class 2": ["EVS", "English", "Telugu", "EHV", "Maths"],
+    }
+    for i in range(3, 11):
+        cls_name = f"Class {i}"
+        subs = ["EVS", "English", "Telugu", "EHV", "Maths", "Hindi", "Science", "Social"]
+        if i >= 5: subs.append("Computer")
+        if i >= 9: subs.insert(0, "AI")
+        base[cls_name] = subs
+
+    groups = ["MPC", "BPC", "CAE"]
+    common = ["English", "Telugu", "EHV"]
+    spec = {
+        "MPC": ["Maths", "Physics", "Chemistry"],
+        "BPC": ["Biology", "Physics", "Chemistry"],
+        "CAE": ["Business Studies", "Accounts", "Economics"]
+    }
+    for i in [11, 12]:
+        for g in groups:
+            base[f"Class {i} ({g})"] = common + spec[g]
+    return base
+
+def empty_data():
+    return {
+        "teachers": [],
+        "timetable": [],
+        "allocations": {},
+        "class_subjects": get_default_subjects(),
+        "availability": [],
+        "settings": dict(DEFAULT_SETTINGS)
+    }
+
+def parse_data(raw):
+    """Normalises a parsed data file; saved subjects are merged over the defaults."""
+    data = empty_data()
+    data["teachers"] = raw.get("teachers", [])
+    data["timetable"] = raw.get("timetable", [])
+    data["allocations"] = raw.get("allocations", {})
+    data["class_subjects"].update(raw.get("class_subjects", {}))
+    data["availability"] = raw.get("availability", [])
+    data["settings"].update(raw.get("settings", {}))
+    return data
+
+def load_data(path=DATA_FILE):
+    """Loads the data file, or returns empty data if it is missing or unreadable."""
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                return parse_data(json.load(f))
+        except Exception:
+            pass
+    return empty_data()
+
+def save_data(data, path=DATA_FILE):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4, default=str)
+
+# --- BACKUPS ---
+def dump_backup(data, compressed=False):
+    """Pretty JSON, or compact JSON streamed straight into gzip."""
+    if not compressed:
+        return json.dumps(data, indent=4, default=str).encode("utf-8")
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode="wb", mtime=0) as gz:
+        w = io.TextIOWrapper(gz, encoding="utf-8")
+        json.dump(data, w, separators=(",", ":"), default=str)
+        w.flush()
+        w.detach()
+    return buf.getvalue()
+
+def read_backup(fileobj):
+    """Parses a .json or .json.gz backup from a binary file object and validates it.
+
+    Decompression and decoding read the stream directly, so only the
+    upload and the parsed result are held in memory.
+    Raises ValueError if the content is not a valid backup.
+    """
+    head = fileobj.read(2)
+    fileobj.seek(0)
+    if head == b"\x1f\x8b":
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode="rb")
+    try:
+        raw = json.load(io.TextIOWrapper(fileobj, encoding="utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError, OSError, EOFError) as e:
+        raise ValueError(f"not a JSON backup ({e})")
+    validate_data(raw)
+    return {
+        "teachers": raw.get("teachers", []),
+        "timetable": raw.get("timetable", []),
+        "allocations": raw.get("allocations", {}),
+        "class_subjects": raw.get("class_subjects", get_default_subjects()),
+        "availability": raw.get("availability", []),
+        "settings": {**DEFAULT_SETTINGS, **raw.get("settings", {})}
+    }
+
+def validate_data(raw):
+    """Raises ValueError describing the first structural problem found."""
+    if not isinstance(raw, dict):
+        raise ValueError("backup must be a JSON object")
+    for i, t in enumerate(raw.get("teachers", [])):
+        if not isinstance(t, dict) or not isinstance(t.get("name"), str):
+            raise ValueError(f"teacher #{i + 1} has no name")
+        for m in t.get("mappings", []):
+            if not isinstance(m, dict) or "class" not in m or "subject" not in m:
+                raise ValueError(f"teacher {t['name']} has a mapping without class/subject")
+    for i, ex in enumerate(raw.get("timetable", [])):
+        missing = [k for k in ("id", "date", "class", "subject", "slot") if k not in ex]
+        if missing:
+            raise ValueError(f"exam #{i + 1} is missing {', '.join(missing)}")
+    if not isinstance(raw.get("allocations", {}), dict):
+        raise ValueError("allocations must be an object keyed by exam id")
+    class_subjects = raw.get("class_subjects", {})
+    if not isinstance(class_subjects, dict) or not all(isinstance(v, list) for v in class_subjects.values()):
+        raise ValueError("class_subjects must map each class to a list of subjects")
+    for i, a in enumerate(raw.get("availability", [])):
+        missing = [k for k in ("teacher", "start", "end") if k not in a]
+        if missing:
+            raise ValueError(f"availability entry #{i + 1} is missing {', '.join(missing)}")
+        try:
+            date.fromisoformat(a["start"]), date.fromisoformat(a["end"])
+        except (TypeError, ValueError):
+            raise ValueError(f"availability entry #{i + 1} has a date that is not YYYY-MM-DD")
+    settings = raw.get("settings", {})
+    if not isinstance(settings, dict):
+        raise ValueError("settings must be an object")
+    for k in DEFAULT_SETTINGS:
+        if k in settings and (not isinstance(settings[k], int) or not 1 <= settings[k] <= MAX_TIER):
+            raise ValueError(f"settings.{k} must be a whole number from 1 to {MAX_TIER}")
+
+def get_all_teacher_names(teachers):
+    return [t['name'] for t in teachers]
+
+def get_all_subjects_unique(class_subjects):
+    s = set()
+    for v in class_subjects.values(): s.update(v)
+    return sorted(list(s))
+
+def get_ordered_classes(class_subjects):
+    keys = list(class_subjects.keys())
+    def sort_key(x):
+        if "Class" in x:
+            parts = x.replace("Class ", "").split(" ")
+            try:
+                num = int(parts[0])
+                suffix = parts[1] if len(parts) > 1 else ""
+                return num, suffix
+            except:
+                return 99, x
+        return 99, x
+    return sorted(keys, key=sort_key)
+
+def get_neighbor_classes(target_class, ordered_classes):
+    """Classes whose teachers are backups for target_class, nearest first.
+
+    Pass a ClassGraph when calling in a loop; a plain list is converted first.
+    """
+    graph = as_class_graph(ordered_classes)
+    if target_class not in graph.near: return []
+    return list(graph.near[target_class])
+
+# ==========================================
+# CLASS GRAPH
+# ==========================================
+def class_grade(cls):
+    """'Class 11 (MPC)' -> 'Class 11'. Streams of one grade are siblings."""
+    return cls.split(" (")[0]
+
+class ClassGraph:
+    """Backup tier of every class as seen from every other, precomputed.
+
+    Grades are nodes in their sorted order. A class k grades away is tier k
+    (up to `hops`); other streams of the same grade are tier `sibling_tier`.
+    near[cls] maps each backup class to its tier, nearest first, so a tier
+    lookup is one dict access. Build a new graph when the class list changes.
+    """
+    __slots__ = ("classes", "hops", "sibling_tier", "near")
+
+    def __init__(self, ordered_classes, hops=1, sibling_tier=1):
+        self.classes = list(ordered_classes)
+        self.hops = hops
+        self.sibling_tier = sibling_tier
+        grades = {}
+        for c in self.classes:
+            grades.setdefault(class_grade(c), []).append(c)
+        members = list(grades.values())
+        pos = {c: i for i, group in enumerate(members) for c in group}
+        self.near = {}
+        for c in self.classes:
+            g = pos[c]
+            tiers = {o: sibling_tier for o in members[g] if o != c}
+            for k in range(1, hops + 1):
+                for j in (g - k, g + k):
+                    if 0 <= j < len(members):
+                        tiers.update((o, k) for o in members[j] if o not in tiers)
+            self.near[c] = dict(sorted(tiers.items(), key=lambda item: item[1]))
+
+@lru_cache(maxsize=8)
+def _graph_for(classes, hops, sibling_tier):
+    return ClassGraph(classes, hops, sibling_tier)
+
+def as_class_graph(classes, settings=None):
+    """The graph itself, or the graph for an ordered class list with the tiers
+    in `settings` (defaults if None); built once per list and settings."""
+    if isinstance(classes, ClassGraph): return classes
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    return _graph_for(tuple(classes), settings["hops"], settings["sibling_tier"])
+
+# ==========================================
+# TEACHER INDEX
+# ==========================================
+# class -> teachers, subject -> teachers, (class, subject) -> teachers.
+# Each bucket maps name -> number of mappings so edits can be undone per teacher;
+# 'names' counts teacher records per name.
+def _index_bump(bucket, key, name, step):
+    names = bucket.setdefault(key, {})
+    names[name] = names.get(name, 0) + step
+    if names[name] <= 0:
+        del names[name]
+        if not names: del bucket[key]
+
+def index_add_teacher(idx, t, step=1):
+    names = idx['names']
+    names[t['name']] = names.get(t['name'], 0) + step
+    if names[t['name']] <= 0: del names[t['name']]
+    for m in t.get('mappings', []):
+        _index_bump(idx['by_class'], m['class'], t['name'], step)
+        _index_bump(idx['by_subject'], m['subject'], t['name'], step)
+        _index_bump(idx['by_pair'], (m['class'], m['subject']), t['name'], step)
+
+def index_remove_teacher(idx, t):
+    index_add_teacher(idx, t, step=-1)
+
+def build_teacher_index(teachers):
+    idx = {"names": {}, "by_class": {}, "by_subject": {}, "by_pair": {}}
+    for t in teachers:
+        index_add_teacher(idx, t)
+    return idx
+
+def copy_teacher_index(idx):
+    """Copy deep enough that index_add/remove_teacher leave the original untouched."""
+    return {k: (dict(b) if k == 'names' else {key: dict(n) for key, n in b.items()}) for k, b in idx.items()}
+
+# ==========================================
+# AVAILABILITY
+# ==========================================
+# Blocked periods: {"id", "teacher", "start", "end", "slots", "reason"} with ISO
+# dates (end inclusive); an empty slot list blocks the whole day.
+NO_ONE = frozenset()
+
+def make_absence(teacher, start, end=None, slots=(), reason=""):
+    return {
+        "id": uuid.uuid4().hex[:8], "teacher": teacher, "start": str(start),
+        "end": str(end or start), "slots": list(slots), "reason": reason
+    }
+
+def build_absence_index(availability):
+    """(date, slot) -> set of teachers blocked then. Intervals are expanded once,
+    so checking whether someone is free is a dict lookup."""
+    absent = {}
+    for a in availability:
+        d, end = date.fromisoformat(a['start']), date.fromisoformat(a['end'])
+        slots = a.get('slots') or SLOT_PERIODS
+        while d <= end:
+            for slot in slots:
+                absent.setdefault((str(d), slot), set()).add(a['teacher'])
+            d += timedelta(days=1)
+    return absent
+
+def absent_at(absent, exam_date, slot):
+    return absent.get((str(exam_date), slot), NO_ONE) if absent else NO_ONE
+
+def exams_during(timetable, allocations, absence):
+    """Ids of exams the absent teacher revises or invigilates during the absence."""
+    name, slots = absence['teacher'], set(absence.get('slots') or SLOT_PERIODS)
+    return [
+        ex['id'] for ex in timetable
+        if absence['start'] <= ex['date'] <= absence['end'] and ex['slot'] in slots
+        and name in (allocations.get(ex['id'], {}).get('inv_teacher'), allocations.get(ex['id'], {}).get('rev_teacher'))
+    ]
+
+# ==========================================
+# CANDIDATES
+# ==========================================
+def get_invigilator_tiers(idx, ordered_classes, exam_class, exam_subject):
+    """Returns candidate pools by tier: [teachers of the class, tier-1 backups, ...].
+
+    ordered_classes may be a ClassGraph to use non-default tiers. Each
+    teacher appears once, in the nearest tier they teach in.
+    """
+    graph = as_class_graph(ordered_classes)
+    excluded = idx['by_subject'].get(exam_subject, {})
+
+    pools = [[n for n in idx['by_class'].get(exam_class, {}) if n not in excluded]]
+    seen = set(pools[0])
+    for nc, tier in graph.near.get(exam_class, {}).items():
+        while len(pools) <= tier: pools.append([])
+        for n in idx['by_class'].get(nc, {}):
+            if n not in excluded and n not in seen:
+                seen.add(n)
+                pools[tier].append(n)
+    return pools
+
+def find_smart_invigilators(idx, ordered_classes, exam_class, exam_subject, off=NO_ONE):
+    """Candidates shuffled within each tier, class teachers first; teachers in `off` are left out."""
+    out = []
+    for pool in get_invigilator_tiers(idx, ordered_classes, exam_class, exam_subject):
+        pool = [n for n in pool if n not in off]
+        random.shuffle(pool)
+        out += pool
+    return out
+
+def get_subject_teacher(idx, exam_class, exam_subject, off=NO_ONE):
+    cands = idx['by_pair'].get((exam_class, exam_subject), {})
+    return next((n for n in cands if n not in off), "Unassigned")
+
+# ==========================================
+# TIMETABLE
+# ==========================================
+def make_exam(exam_date, cls, subject, slot):
+    rev_p, exam_p = SLOT_PERIODS[slot]
+    return {
+        "id": f"{exam_date}_{cls}_{slot}", "date": str(exam_date), "class": cls,
+        "subject": subject, "slot": slot,
+        "rev_p": rev_p, "exam_p": exam_p
+    }
+
+def generate_timetable(class_subjects, start_date, slots_per_day, ordered_classes=None, progress=None):
+    """Places the n-th subject of every class on the same day/slot, skipping Sundays.
+
+    progress, if given, is called after each day as progress(stage=..., days_placed=..., total_days=...);
+    it may raise Cancelled to stop the run.
+    """
+    if ordered_classes is None:
+        ordered_classes = get_ordered_classes(class_subjects)
+    timetable = []
+    curr_date = start_date
+    max_subs = max([len(v) for v in class_subjects.values()], default=0)
+    total_days = -(-max_subs // slots_per_day)
+    sub_idx = 0
+
+    while sub_idx < max_subs:
+        while curr_date.weekday() == 6:
+            curr_date += timedelta(days=1)
+
+        for offset, slot in enumerate(["Morning", "Afternoon"][:slots_per_day]):
+            if sub_idx + offset >= max_subs: break
+            for cls in ordered_classes:
+                subs = class_subjects[cls]
+                if sub_idx + offset < len(subs):
+                    timetable.append(make_exam(curr_date, cls, subs[sub_idx + offset], slot))
+
+        sub_idx += slots_per_day
+        curr_date += timedelta(days=1)
+        if progress:
+            progress(stage="placing", days_placed=sub_idx // slots_per_day, total_days=total_days)
+    return timetable
+
+# ==========================================
+# INVIGILATION SOLVER
+# ==========================================
+def assign_all_exams(timetable, idx, ordered_classes, progress=None, absent=None):
+    """Assigns invigilators to the whole timetable at once.
+
+    One duty per teacher per (date, slot); teachers blocked in `absent`
+    (see build_absence_index) get no duty in that slot. Primary-tier teachers are always
+    preferred over neighbour-class ones; within a tier the least loaded
+    teacher wins, and a final pass moves duties off the busiest teachers.
+    progress is called after each slot as progress(stage=..., exams_assigned=..., total_exams=...).
+    """
+    graph = as_class_graph(ordered_classes)
+    allocations = {}
+    load = {}
+    tier_of = {}    # eid -> {teacher: tier}
+    slot_busy = {}  # (date, slot) -> {teacher: eid}
+    pools = {}      # (class, subject) -> (tier pools, candidates shared by its exams)
+    slots = {}
+    for ex in timetable:
+        slots.setdefault((ex['date'], ex['slot']), []).append(ex)
+
+    for key in sorted(slots):
+        busy = slot_busy.setdefault(key, {})
+        off = absent_at(absent, *key)
+        exams = []
+        for ex in slots[key]:
+            pair = (ex['class'], ex['subject'])
+            if pair not in pools:
+                by_tier = get_invigilator_tiers(idx, graph, *pair)
+                pools[pair] = (by_tier, [n for pool in by_tier for n in pool])
+            by_tier, candidates = pools[pair]
+            # Shuffled copies only break ties between equally loaded teachers
+            tier_of[ex['id']] = {
+                n: t for t, pool in enumerate(by_tier) for n in random.sample(pool, len(pool)) if n not in off
+            }
+            allocations[ex['id']] = {
+                "rev_teacher": get_subject_teacher(idx, *pair, off),
+                "inv_teacher": "Unassigned",
+                "backup_invs": candidates
+            }
+            exams.append(ex['id'])
+
+        # Most constrained exams pick first
+        exams.sort(key=lambda eid: len(tier_of[eid]))
+        for eid in exams:
+            free = [n for n in tier_of[eid] if n not in busy]
+            if not free:
+                free = _free_by_swap(eid, tier_of, busy, allocations, load)
+            if not free: continue
+            pick = min(free, key=lambda n: (tier_of[eid][n], load.get(n, 0)))
+            allocations[eid]['inv_teacher'] = pick
+            busy[pick] = eid
+            load[pick] = load.get(pick, 0) + 1
+        if progress:
+            progress(stage="assigning", exams_assigned=len(allocations), total_exams=len(timetable))
+
+    if progress:
+        progress(stage="balancing")
+    _balance_load(slots, tier_of, slot_busy, allocations, load)
+    return allocations
+
+def _free_by_swap(eid, tier_of, busy, allocations, load):
+    # Free a candidate by moving the exam holding them to another free teacher of the same tier.
+    for n in tier_of[eid]:
+        other = busy[n]
+        for alt in tier_of[other]:
+            if alt not in busy and tier_of[other][alt] <= tier_of[other][n]:
+                allocations[other]['inv_teacher'] = alt
+                busy[alt] = other
+                del busy[n]
+                load[n] -= 1
+                load[alt] = load.get(alt, 0) + 1
+                return [n]
+    return []
+
+def _balance_load(slots, tier_of, slot_busy, allocations, load, max_passes=10):
+    for _ in range(max_passes):
+        moved = False
+        for key, exams in slots.items():
+            busy = slot_busy[key]
+            for ex in exams:
+                eid = ex['id']
+                cur = allocations[eid]['inv_teacher']
+                if cur not in busy: continue
+                tiers = tier_of[eid]
+                best = min(
+                    (n for n in tiers if n not in busy and tiers[n] <= tiers[cur]),
+                    key=lambda n: load.get(n, 0), default=None
+                )
+                if best is not None and load.get(best, 0) + 1 < load[cur]:
+                    allocations[eid]['inv_teacher'] = best
+                    del busy[cur]
+                    busy[best] = eid
+                    load[cur] -= 1
+                    load[best] = load.get(best, 0) + 1
+                    moved = True
+        if not moved: break
+
+def build_schedule(data, start_date, slots_per_day, class_graph=None):
+    """Regenerates data['timetable'] and data['allocations'] in place.
+
+    class_graph overrides the backup tiers in data["settings"] (see ClassGraph).
+    """
+    ordered = get_ordered_classes(data["class_subjects"])
+    idx = build_teacher_index(data["teachers"])
+    absent = build_absence_index(data.get("availability", []))
+    data["timetable"] = generate_timetable(data["class_subjects"], start_date, slots_per_day, ordered)
+    data["allocations"] = assign_all_exams(
+        data["timetable"], idx, class_graph or as_class_graph(ordered, data.get("settings")), absent=absent
+    )
+    return data
+
+# ==========================================
+# INCREMENTAL RE-ALLOCATION
+# ==========================================
+SLOT_ORDER = {slot: i for i, slot in enumerate(SLOT_PERIODS)}
+
+def _slot_key(key):
+    return key[0], SLOT_ORDER.get(key[1], 99)
+
+def exams_touching(timetable, allocations, ordered_classes, names, classes):
+    """Ids of exams whose allocation mentions one of `names`, or whose class
+    is in `classes` or a backup tier of one of them (so its candidate list may change)."""
+    names = set(names)
+    near = set(classes)
+    graph = as_class_graph(ordered_classes)
+    for c in classes:
+        near.update(graph.near.get(c, ()))
+    out = []
+    for ex in timetable:
+        a = allocations.get(ex['id'], {})
+        if (ex['class'] in near or a.get('rev_teacher') in names or a.get('inv_teacher') in names
+                or not names.isdisjoint(a.get('backup_invs', ()))):
+            out.append(ex['id'])
+    return out
+
+def reassign_exams(timetable, allocations, idx, ordered_classes, eids, absent=None):
+    """Recomputes candidates for the given exams only and returns {eid: allocation}
+    for those whose allocation changed. `allocations` is updated in place.
+
+    A current revision teacher is kept while they still teach the subject to
+    the class, and a current invigilator while they are still in one of the
+    class's candidate tiers and free in that slot; neither may be blocked in
+    `absent`. Manual choices survive that way; otherwise the best free
+    candidate is picked the same way as assign_all_exams does.
+    """
+    graph = as_class_graph(ordered_classes)
+    eids = set(eids)
+    targets = []
+    busy = {}
+    load = {}
+    for ex in timetable:
+        if ex['id'] in eids:
+            targets.append(ex)
+            continue
+        inv = allocations.get(ex['id'], {}).get('inv_teacher')
+        if inv and inv != "Unassigned":
+            busy.setdefault((ex['date'], ex['slot']), set()).add(inv)
+            load[inv] = load.get(inv, 0) + 1
+
+    changed = {}
+    pools = {}      # (class, subject) -> (tier pools, candidates shared by its exams)
+    for ex in sorted(targets, key=lambda ex: _slot_key((ex['date'], ex['slot']))):
+        cls, sub = ex['class'], ex['subject']
+        old = allocations.get(ex['id'], {})
+        taken = busy.setdefault((ex['date'], ex['slot']), set())
+        off = absent_at(absent, ex['date'], ex['slot'])
+
+        pair = (cls, sub)
+        if pair not in pools:
+            by_tier = get_invigilator_tiers(idx, graph, *pair)
+            pools[pair] = (by_tier, [n for pool in by_tier for n in pool])
+        by_tier, candidates = pools[pair]
+
+        rev = old.get('rev_teacher')
+        if rev not in idx['by_pair'].get(pair, {}) or rev in off:
+            rev = get_subject_teacher(idx, cls, sub, off)
+
+        # Candidates already leave out the subject's teachers
+        inv = old.get('inv_teacher')
+        if inv not in candidates or inv in taken or inv in off:
+            tiers = {
+                n: t for t, pool in enumerate(by_tier) for n in random.sample(pool, len(pool)) if n not in off
+            }
+            free = [n for n in tiers if n not in taken]
+            inv = min(free, key=lambda n: (tiers[n], load.get(n, 0)), default="Unassigned")
+        if inv != "Unassigned":
+            taken.add(inv)
+            load[inv] = load.get(inv, 0) + 1
+
+        new = {"rev_teacher": rev, "inv_teacher": inv, "backup_invs": candidates}
+        if (old.get('rev_teacher'), old.get('inv_teacher'), set(old.get('backup_invs', ()))) != \
+                (rev, inv, set(new['backup_invs'])):
+            allocations[ex['id']] = new
+            changed[ex['id']] = new
+    return changed
+
+def place_subject(timetable, cls, subject):
+    """Exam for a newly added subject in the first scheduled slot the class
+    has free, or on the next working day after the last exam. None if the
+    class already sits that subject or there is no timetable."""
+    if not timetable: return None
+    used = set()
+    for ex in timetable:
+        if ex['class'] == cls:
+            if ex['subject'] == subject: return None
+            used.add((ex['date'], ex['slot']))
+    slots = sorted({(ex['date'], ex['slot']) for ex in timetable}, key=_slot_key)
+    for d, slot in slots:
+        if (d, slot) not in used:
+            return make_exam(date.fromisoformat(d), cls, subject, slot)
+    next_day = date.fromisoformat(slots[-1][0]) + timedelta(days=1)
+    while next_day.weekday() == 6:
+        next_day += timedelta(days=1)
+    return make_exam(next_day, cls, subject, "Morning")
+
+def move_exam(timetable, allocations, eid, new_date, new_slot):
+    """Moves one exam in place (its id changes with date/slot) and carries its
+    allocation over. Returns the moved exam. Raises ValueError if the class
+    already has an exam in that slot."""
+    pos = next((i for i, ex in enumerate(timetable) if ex['id'] == eid), None)
+    if pos is None:
+        raise ValueError(f"No exam {eid}")
+    ex = timetable[pos]
+    moved = make_exam(new_date, ex['class'], ex['subject'], new_slot)
+    if moved['id'] == eid: return ex
+    if any(o['id'] == moved['id'] for o in timetable):
+        raise ValueError(f"{ex['class']} already has an exam on {new_date} ({new_slot})")
+    timetable[pos] = moved
+    if eid in allocations:
+        allocations[moved['id']] = allocations.pop(eid)
+    return moved
+
+# ==========================================
+# VIEWS
+# ==========================================
+def group_by_date(timetable):
+    by_date = {}
+    for ex in timetable:
+        by_date.setdefault(ex['date'], []).append(ex)
+    return dict(sorted(by_date.items()))
+
+# ==========================================
+# EXPORT
+# ==========================================
+def convert_df_to_excel(df):
+    import pandas as pd
+
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=True, sheet_name='Sheet1')
+    return output.getvalue()
@@ -0,0 +1,155 @@
+"""Process-wide shared copy of the school data.
+
+All sessions read one parsed Snapshot instead of keeping their own copy.
+A Snapshot is never modified after it is published: edits go through
+SharedStore.edit(), which hands out a Draft whose sections are copied
+on first use, persists the recorded storage writes in one transaction and
+publishes a new Snapshot under a writer lock. Writes made elsewhere
+(background jobs, the CLI, another process) are picked up by comparing
+storage versions, reloading only the sections that changed. Loaded and
+edited sections go through compact.share_strings(), so names and candidate
+lists are held once.
+"""
+import threading
+from contextlib import contextmanager
+
+import compact
+import scheduler as core
+from storage import SECTIONS
+
+
+class Snapshot:
+    """Read-only view of one data version, plus the derived class order,
+    class graph, teacher index and absence index."""
+
+    def __init__(self, versions, teachers, timetable, allocations, class_subjects, availability, settings,
+                 teacher_index=None, absent=None):
+        self.versions = versions
+        self.teachers = teachers
+        self.timetable = timetable
+        self.allocations = allocations
+        self.class_subjects = class_subjects
+        self.availability = availability
+        self.settings = settings
+        self.ordered_classes = core.get_ordered_classes(class_subjects)
+        self.class_graph = core.as_class_graph(self.ordered_classes, settings)
+        self.teacher_index = teacher_index or core.build_teacher_index(teachers)
+        self.absent = core.build_absence_index(availability) if absent is None else absent
+
+    @property
+    def version(self):
+        return self.versions["version"]
+
+    def data(self):
+        return {s: getattr(self, s) for s in SECTIONS}
+
+
+class Draft:
+    """Copy-on-write edit of a Snapshot.
+
+    Reading a section attribute gives a shallow copy owned by the draft;
+    replace items (allocations[eid] = {...}) rather than mutating the shared
+    ones in place. Storage writes are recorded with save() and run on commit.
+    """
+
+    def __init__(self, snap):
+        self._snap = snap
+        self._copies = {}
+        self._index = None
+        self.ops = []
+
+    def __getattr__(self, name):
+        if name not in SECTIONS:
+            raise AttributeError(name)
+        if name not in self._copies:
+            value = getattr(self._snap, name)
+            self._copies[name] = list(value) if isinstance(value, list) else dict(value)
+        return self._copies[name]
+
+    @property
+    def teacher_index(self):
+        if self._index is None:
+            self._index = core.copy_teacher_index(self._snap.teacher_index)
+        return self._index
+
+    @property
+    def ordered_classes(self):
+        if "class_subjects" in self._copies:
+            return core.get_ordered_classes(self._copies["class_subjects"])
+        return self._snap.ordered_classes
+
+    @property
+    def class_graph(self):
+        if "class_subjects" in self._copies or "settings" in self._copies:
+            return core.as_class_graph(self.ordered_classes, self._copies.get("settings", self._snap.settings))
+        return self._snap.class_graph
+
+    @property
+    def absent(self):
+        if "availability" in self._copies:
+            return core.build_absence_index(self._copies["availability"])
+        return self._snap.absent
+
+    def save(self, method, *args):
+        """Records a Storage write to run when the edit commits."""
+        self.ops.append((method, args))
+
+
+class SharedStore:
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._snap = None
+
+    def current(self):
+        """The latest Snapshot, reloading sections another writer changed."""
+        snap = self._snap
+        if snap is not None and self.storage.versions() == snap.versions:
+            return snap
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        snap = self._snap
+        with self.storage.read() as store:
+            versions = store.versions()
+            if snap is not None and versions == snap.versions:
+                return snap
+            changed = [s for s in SECTIONS if snap is None or snap.versions[s] != versions[s]]
+            sections = compact.share_strings({s: store.load(s) for s in changed})
+        sections.update({s: getattr(snap, s) for s in SECTIONS if s not in changed})
+        index = snap.teacher_index if snap and sections["teachers"] is snap.teachers else None
+        absent = snap.absent if snap and sections["availability"] is snap.availability else None
+        self._snap = Snapshot(versions, teacher_index=index, absent=absent, **sections)
+        return self._snap
+
+    @contextmanager
+    def edit(self):
+        """Yields a Draft of the latest data; on exit persists it and publishes it.
+
+        Nothing is written or published if the block raises.
+        """
+        with self._lock:
+            base = self._refresh()
+            draft = Draft(base)
+            yield draft
+            if not draft.ops:
+                return
+            with self.storage.batch():
+                for method, args in draft.ops:
+                    getattr(self.storage, method)(*args)
+            written = self.storage.last_written()
+
+            versions = dict(base.versions)
+            versions.update(written)
+            # Another process wrote in between: reload instead of trusting the draft
+            if written.get("version") != base.version + 1:
+                self._refresh()
+                return
+            sections = {s: draft._copies.get(s, getattr(base, s)) for s in SECTIONS}
+            compact.share_strings({s: draft._copies[s] for s in draft._copies})
+            index = draft._index if draft._index is not None else base.teacher_index
+            if "teachers" in draft._copies and draft._index is None:
+                index = None
+            absent = None if "availability" in draft._copies else base.absent
+            self._snap = Snapshot(versions, teacher_index=index, absent=absent, **sections)
@@ -0,0 +1,310 @@
+"""SQLite storage backend.
+
+Each teacher, exam, allocation and class subject list is its own row, so an
+edit only rewrites the records it touches. The database runs in WAL mode:
+readers never block, and concurrent writers are serialised per transaction
+instead of overwriting each other's whole file.
+
+Every write bumps a global version and the version of the section it
+changed, so sessions can reload only what another session modified.
+The JSON data file is still used for import (first run) and backups.
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import scheduler as core
+
+DB_FILE = "school_data.db"
+SECTIONS = ("teachers", "timetable", "allocations", "class_subjects", "availability", "settings")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS teachers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    mappings TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS exams (
+    id TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exams_date ON exams(date);
+CREATE TABLE IF NOT EXISTS allocations (
+    eid TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS class_subjects (
+    cls TEXT PRIMARY KEY,
+    subjects TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS availability (
+    id TEXT PRIMARY KEY,
+    teacher TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS availability_dates ON availability(start, end);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class Storage:
+    def __init__(self, path=DB_FILE, json_path=core.DATA_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+        if json_path and self.version() == 0 and os.path.exists(json_path):
+            self.replace_all(core.load_data(json_path))
+
+    # --- CONNECTION ---
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Closes this thread's connection; the next call opens a new one.
+
+        Closing the last connection checkpoints the WAL and removes the
+        -wal/-shm files.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def _write(self, *sections):
+        """One IMMEDIATE transaction; bumps the global and per-section versions on commit.
+
+        Writes nested inside batch() join the outer transaction. The new
+        versions are left in last_written() for the calling thread.
+        """
+        conn = self._conn()
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending.update(sections)
+            yield conn
+            return
+        self._local.pending = pending = set(sections)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            written = {}
+            for key in ("version",) + tuple(sorted(pending)):
+                written[key] = conn.execute(
+                    "INSERT INTO meta(key, value) VALUES (?, 1) "
+                    "ON CONFLICT(key) DO UPDATE SET value = value + 1 RETURNING value", (key,)
+                ).fetchone()[0]
+            conn.execute("COMMIT")
+            self._local.written = written
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            self._local.pending = None
+
+    def batch(self):
+        """Groups several writes into one transaction and one version bump."""
+        return self._write()
+
+    @contextmanager
+    def read(self):
+        """Read transaction: everything loaded inside sees one consistent snapshot."""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            yield self
+        finally:
+            conn.execute("COMMIT")
+
+    def last_written(self):
+        return getattr(self._local, "written", {})
+
+    def version(self, section="version"):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (section,)).fetchone()
+        return row[0] if row else 0
+
+    def versions(self):
+        rows = self._conn().execute("SELECT key, value FROM meta").fetchall()
+        found = dict(rows)
+        return {k: found.get(k, 0) for k in ("version",) + SECTIONS}
+
+    # --- LOADING ---
+    def load_teachers(self):
+        rows = self._conn().execute("SELECT name, mappings FROM teachers ORDER BY id")
+        return [{"name": n, "mappings": json.loads(m)} for n, m in rows]
+
+    def load_timetable(self):
+        rows = self._conn().execute("SELECT body FROM exams ORDER BY pos")
+        return [json.loads(b) for (b,) in rows]
+
+    def load_allocations(self):
+        rows = self._conn().execute("SELECT eid, body FROM allocations")
+        return {eid: json.loads(b) for eid, b in rows}
+
+    def load_class_subjects(self):
+        """Saved subjects merged over the defaults."""
+        class_subjects = core.get_default_subjects()
+        rows = self._conn().execute("SELECT cls, subjects FROM class_subjects")
+        class_subjects.update({c: json.loads(s) for c, s in rows})
+        return class_subjects
+
+    def load_availability(self):
+        rows = self._conn().execute("SELECT body FROM availability ORDER BY start, teacher")
+        return [json.loads(b) for (b,) in rows]
+
+    def load_settings(self):
+        """Saved settings merged over the defaults."""
+        rows = self._conn().execute("SELECT key, value FROM settings")
+        return {**core.DEFAULT_SETTINGS, **{k: json.loads(v) for k, v in rows}}
+
+    def load(self, section):
+        return getattr(self, f"load_{section}")()
+
+    def load_all(self):
+        return {s: self.load(s) for s in SECTIONS}
+
+    # --- WRITING ---
+    def save_teacher(self, t):
+        """Inserts a teacher, or replaces the mappings of the teacher with that name."""
+        self.save_teachers([t])
+
+    def save_teachers(self, teachers):
+        with self._write("teachers") as db:
+            db.executemany(
+                "INSERT INTO teachers(name, mappings) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET mappings = excluded.mappings",
+                [(t["name"], json.dumps(t.get("mappings", []))) for t in teachers]
+            )
+
+    def delete_teacher(self, name):
+        with self._write("teachers") as db:
+            db.execute("DELETE FROM teachers WHERE name = ?", (name,))
+
+    def save_allocation(self, eid, alloc):
+        self.save_allocations({eid: alloc})
+
+    def save_allocations(self, allocations):
+        with self._write("allocations") as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO allocations(eid, body) VALUES (?, ?)",
+                [(eid, json.dumps(a, default=str)) for eid, a in allocations.items()]
+            )
+
+    def save_class_subjects(self, class_subjects):
+        """Saves the subject lists of the given classes only."""
+        with self._write("class_subjects") as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO class_subjects(cls, subjects) VALUES (?, ?)",
+                [(c, json.dumps(s)) for c, s in class_subjects.items()]
+            )
+
+    def save_absences(self, entries):
+        with self._write("availability") as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO availability(id, teacher, start, end, body) VALUES (?, ?, ?, ?, ?)",
+                [(a["id"], a["teacher"], a["start"], a["end"], json.dumps(a)) for a in entries]
+            )
+
+    def delete_absence(self, aid):
+        with self._write("availability") as db:
+            db.execute("DELETE FROM availability WHERE id = ?", (aid,))
+
+    def save_settings(self, settings):
+        """Saves the given settings only."""
+        with self._write("settings") as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO settings(key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in settings.items()]
+            )
+
+    def update_schedule(self, exams=(), allocations=None, removed=()):
+        """Upserts some exams and allocations and deletes others, in one transaction.
+
+        New exams are appended after the existing ones.
+        """
+        sections = ("timetable",) if exams or removed else ()
+        sections += ("allocations",) if allocations or removed else ()
+        if not sections: return
+        with self._write(*sections) as db:
+            db.executemany("DELETE FROM exams WHERE id = ?", [(eid,) for eid in removed])
+            db.executemany("DELETE FROM allocations WHERE eid = ?", [(eid,) for eid in removed])
+            for ex in exams:
+                db.execute(
+                    "INSERT INTO exams(id, date, pos, body) "
+                    "VALUES (?, ?, (SELECT COALESCE(MAX(pos), -1) + 1 FROM exams), ?) "
+                    "ON CONFLICT(id) DO UPDATE SET date = excluded.date, body = excluded.body",
+                    (ex["id"], str(ex["date"]), json.dumps(ex, default=str))
+                )
+            db.executemany(
+                "INSERT OR REPLACE INTO allocations(eid, body) VALUES (?, ?)",
+                [(eid, json.dumps(a, default=str)) for eid, a in (allocations or {}).items()]
+            )
+
+    def replace_schedule(self, timetable, allocations):
+        """Swaps in a new timetable and its allocations atomically."""
+        with self._write("timetable", "allocations") as db:
+            self._replace_schedule(db, timetable, allocations)
+
+    def replace_all(self, data):
+        with self._write(*SECTIONS) as db:
+            db.execute("DELETE FROM teachers")
+            db.execute("DELETE FROM class_subjects")
+            db.execute("DELETE FROM availability")
+            db.execute("DELETE FROM settings")
+            db.executemany(
+                "INSERT OR REPLACE INTO teachers(name, mappings) VALUES (?, ?)",
+                [(t["name"], json.dumps(t.get("mappings", []))) for t in data.get("teachers", [])]
+            )
+            db.executemany(
+                "INSERT INTO class_subjects(cls, subjects) VALUES (?, ?)",
+                [(c, json.dumps(s)) for c, s in data.get("class_subjects", {}).items()]
+            )
+            # Entries from older backups get an id and the default fields
+            absences = [
+                {**core.make_absence(a["teacher"], a["start"], a["end"]), **a} for a in data.get("availability", [])
+            ]
+            db.executemany(
+                "INSERT INTO availability(id, teacher, start, end, body) VALUES (?, ?, ?, ?, ?)",
+                [(a["id"], a["teacher"], a["start"], a["end"], json.dumps(a)) for a in absences]
+            )
+            db.executemany(
+                "INSERT INTO settings(key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in data.get("settings", {}).items()]
+            )
+            self._replace_schedule(db, data.get("timetable", []), data.get("allocations", {}))
+
+    def _replace_schedule(self, db, timetable, allocations):
+        db.execute("DELETE FROM exams")
+        db.execute("DELETE FROM allocations")
+        db.executemany(
+            "INSERT OR REPLACE INTO exams(id, date, pos, body) VALUES (?, ?, ?, ?)",
+            [(ex["id"], str(ex["date"]), i, json.dumps(ex, default=str)) for i, ex in enumerate(timetable)]
+        )
+        db.executemany(
+            "INSERT OR REPLACE INTO allocations(eid, body) VALUES (?, ?)",
+            [(eid, json.dumps(a, default=str)) for eid, a in allocations.items()]
+        )
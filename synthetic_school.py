@@ -0,0 +1,63 @@
+"""Synthetic school data for benchmarks and load testing.
+
+Example:
+    python synthetic_school.py --teachers 500 --out school_data_v6.json
+"""
+import argparse
+import json
+import random
+
+import scheduler as core
+
+
+def make_class_subjects(n_classes=None, subjects_per_class=8, n_subjects=None):
+    """Default school layout, or n_classes classes drawing from a shared subject pool."""
+    if n_classes is None:
+        return core.get_default_subjects()
+    n_subjects = n_subjects or subjects_per_class * 2
+    pool = [f"Subject {i + 1}" for i in range(n_subjects)]
+    rng = random.Random(n_classes)
+    return {f"Class {i + 1}": rng.sample(pool, min(subjects_per_class, n_subjects)) for i in range(n_classes)}
+
+
+def make_teachers(class_subjects, n_teachers, mappings_per_teacher=3, rng=None):
+    """Each teacher teaches one subject to mappings_per_teacher nearby classes, like real staff."""
+    rng = rng or random.Random(0)
+    ordered = core.get_ordered_classes(class_subjects)
+    teachers = []
+    for i in range(n_teachers):
+        start = rng.randrange(len(ordered))
+        mappings = []
+        for cls in ordered[start:start + mappings_per_teacher]:
+            mappings.append({"class": cls, "subject": rng.choice(class_subjects[cls])})
+        teachers.append({"name": f"Teacher {i + 1:05d}", "mappings": mappings})
+    return teachers
+
+
+def make_school(n_teachers, n_classes=None, subjects_per_class=8, mappings_per_teacher=3, seed=0):
+    data = core.empty_data()
+    data["class_subjects"] = make_class_subjects(n_classes, subjects_per_class)
+    data["teachers"] = make_teachers(
+        data["class_subjects"], n_teachers, mappings_per_teacher, random.Random(seed)
+    )
+    return data
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Write a synthetic school data file.")
+    p.add_argument("--teachers", type=int, default=100)
+    p.add_argument("--classes", type=int, help="number of classes (default: the built-in class list)")
+    p.add_argument("--subjects-per-class", type=int, default=8)
+    p.add_argument("--mappings", type=int, default=3, help="mappings per teacher")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", default="synthetic_school.json")
+    args = p.parse_args(argv)
+
+    data = make_school(args.teachers, args.classes, args.subjects_per_class, args.mappings, args.seed)
+    with open(args.out, "w") as f:
+        json.dump(data, f)
+    print(f"Wrote {len(data['teachers'])} teachers, {len(data['class_subjects'])} classes to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
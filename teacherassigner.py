@@ -1,77 +1,93 @@
 import streamlit as st
 import pandas as pd
-import random
-import io
-import json
+import functools
 import os
-from datetime import timedelta, datetime
+from contextlib import contextmanager
+from datetime import datetime
+
+import scheduler as core
+from storage import Storage, SECTIONS
+from shared_store import SharedStore
+import analytics
+import columnar
+import excel_export
+import duty_slips
+import roster_import
+import jobs
+from profiling import Profiler, NULL_PROFILER
 
 # ==========================================
 # 1. CONFIGURATION & STATE
 # ==========================================
 st.set_page_config(page_title="Exam Manager", layout="wide")
-DATA_FILE = "school_data_v6.json"
+
+# --- PROFILING (off unless EXAM_PROFILE=1 or ?profile=1) ---
+def get_profiler():
+    if os.environ.get("EXAM_PROFILE") != "1" and st.query_params.get("profile") != "1":
+        return NULL_PROFILER
+    if 'profiler' not in st.session_state:
+        st.session_state.profiler = Profiler(log_path=os.environ.get("EXAM_PROFILE_LOG"))
+    return st.session_state.profiler
+
+def profiled(label):
+    """Times a tab body; on a fragment rerun it is recorded as a run of its own."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with PROFILER.run(label):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+PROFILER = get_profiler()
+PROFILER.begin("app")
 
 # --- PERSISTENCE FUNCTIONS ---
-def save_to_disk():
-    """Saves current session state to a local JSON file."""
-    data = {
+@st.cache_resource
+def get_storage():
+    return Storage()
+
+# One parsed copy of the data per process, shared by every session
+@st.cache_resource
+def get_shared_store():
+    return SharedStore(get_storage())
+
+def session_data():
+    return {
         "teachers": st.session_state.teachers,
         "timetable": st.session_state.timetable,
         "allocations": st.session_state.allocations,
-        "class_subjects": st.session_state.class_subjects
-    }
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4, default=str)
-
-def load_from_disk():
-    """Loads data from local JSON file if it exists."""
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-                st.session_state.teachers = data.get("teachers", [])
-                st.session_state.timetable = data.get("timetable", [])
-                st.session_state.allocations = data.get("allocations", {})
-                
-                # Merge saved subjects
-                saved_subs = data.get("class_subjects", {})
-                st.session_state.class_subjects = get_default_subjects()
-                st.session_state.class_subjects.update(saved_subs)
-        except Exception as e:
-            pass
-
-def get_default_subjects():
-    base = {
-        "Class 1": ["EVS", "English", "Telugu", "EHV", "Maths"],
-        "Class 2": ["EVS", "English", "Telugu", "EHV", "Maths"],
-    }
-    for i in range(3, 11):
-        cls_name = f"Class {i}"
-        subs = ["EVS", "English", "Telugu", "EHV", "Maths", "Hindi", "Science", "Social"]
-        if i >= 5: subs.append("Computer")
-        if i >= 9: subs.insert(0, "AI")
-        base[cls_name] = subs
-        
-    groups = ["MPC", "BPC", "CAE"]
-    common = ["English", "Telugu", "EHV"]
-    spec = {
-        "MPC": ["Maths", "Physics", "Chemistry"],
-        "BPC": ["Biology", "Physics", "Chemistry"],
-        "CAE": ["Business Studies", "Accounts", "Economics"]
+        "class_subjects": st.session_state.class_subjects,
+        "availability": st.session_state.availability,
+        "settings": st.session_state.settings
     }
-    for i in [11, 12]:
-        for g in groups:
-            base[f"Class {i} ({g})"] = common + spec[g]
-    return base
+
+def load_shared():
+    """Points this session at the latest shared snapshot; nothing is copied."""
+    snap = get_shared_store().current()
+    for section in SECTIONS:
+        st.session_state[section] = getattr(snap, section)
+    st.session_state.teacher_index = snap.teacher_index
+    st.session_state.ordered_classes = snap.ordered_classes
+    st.session_state.class_graph = snap.class_graph
+    st.session_state.absent = snap.absent
+    st.session_state.data_version = snap.version
+
+@contextmanager
+def edit_data():
+    """Copy-on-write edit of the shared data, saved and published to all sessions on exit.
+
+    Record writes with d.save(method, *args). Call st.rerun() after the block,
+    not inside it: leaving the block by an exception discards the edit.
+    """
+    with PROFILER.stage("save"):
+        with get_shared_store().edit() as draft:
+            yield draft
+    load_shared()
 
 # --- INITIALIZATION ---
-if 'teachers' not in st.session_state:
-    st.session_state.teachers = []
-    st.session_state.timetable = []
-    st.session_state.allocations = {}
-    st.session_state.class_subjects = get_default_subjects()
-    load_from_disk()
+with PROFILER.stage("load_shared"):
+    load_shared()
 
 if 'temp_teacher_mappings' not in st.session_state:
     st.session_state.temp_teacher_mappings = []
@@ -166,118 +182,110 @@ st.markdown("""
 # ==========================================
 # 3. HELPER FUNCTIONS & LOGIC
 # ==========================================
+# Thin session wrappers around the headless core in scheduler.py
 def get_all_teacher_names():
-    return [t['name'] for t in st.session_state.teachers]
+    return core.get_all_teacher_names(st.session_state.teachers)
 
-def get_ordered_classes():
-    keys = list(st.session_state.class_subjects.keys())
-    def sort_key(x):
-        if "Class" in x:
-            parts = x.replace("Class ", "").split(" ")
-            try:
-                num = int(parts[0])
-                suffix = parts[1] if len(parts) > 1 else ""
-                return num, suffix
-            except:
-                return 99, x
-        return 99, x
-    return sorted(keys, key=sort_key)
-
-ORDERED_CLASSES = get_ordered_classes()
-
-def get_neighbor_classes(target_class):
-    if target_class not in ORDERED_CLASSES: return []
-    idx = ORDERED_CLASSES.index(target_class)
-    neighbors = []
-    if idx > 0: neighbors.append(ORDERED_CLASSES[idx - 1])
-    if idx < len(ORDERED_CLASSES) - 1: neighbors.append(ORDERED_CLASSES[idx + 1])
-    return neighbors
-
-def find_smart_invigilators(exam_class, exam_subject):
-    primary_pool = []
-    backup_pool = []
-    
-    for t in st.session_state.teachers:
-        name = t['name']
-        mappings = t.get('mappings', [])
-        
-        teaches_class = any(m['class'] == exam_class for m in mappings)
-        teaches_subject = any(m['subject'] == exam_subject for m in mappings)
-        
-        if teaches_subject: continue 
-            
-        if teaches_class:
-            primary_pool.append(name)
-        else:
-            neighbors = get_neighbor_classes(exam_class)
-            if any(m['class'] in neighbors for m in mappings):
-                backup_pool.append(name)
-    
-    random.shuffle(primary_pool)
-    random.shuffle(backup_pool)
-    return primary_pool + backup_pool
-
-def get_subject_teacher(exam_class, exam_subject):
-    cands = []
-    for t in st.session_state.teachers:
-        for m in t.get('mappings', []):
-            if m['class'] == exam_class and m['subject'] == exam_subject:
-                cands.append(t['name'])
-    return cands[0] if cands else "Unassigned"
-
-def auto_assign_exam(eid, cls, sub):
-    rev_teacher = get_subject_teacher(cls, sub)
-    inv_options = find_smart_invigilators(cls, sub)
-    inv_teacher = inv_options[0] if inv_options else "Unassigned"
-    
-    st.session_state.allocations[eid] = {
-        "rev_teacher": rev_teacher,
-        "inv_teacher": inv_teacher,
-        "backup_invs": inv_options
-    }
+def get_all_subjects_unique():
+    return core.get_all_subjects_unique(st.session_state.class_subjects)
+
+ORDERED_CLASSES = st.session_state.ordered_classes
 
 def convert_df_to_excel(df):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=True, sheet_name='Sheet1')
-    return output.getvalue()
+    return core.convert_df_to_excel(df)
+
+# --- INCREMENTAL RE-ALLOCATION (inside edit_data) ---
+def reallocate(d, eids):
+    """Re-solves only the given exams of draft d; returns the allocations that changed."""
+    return core.reassign_exams(d.timetable, d.allocations, d.teacher_index, d.class_graph, eids, d.absent)
+
+def reallocate_for_teachers(d, names, classes):
+    """After teachers are added, edited or deleted: re-solves the exams they could affect and saves them."""
+    if not d.timetable: return
+    eids = core.exams_touching(d.timetable, d.allocations, d.class_graph, names, classes)
+    changed = reallocate(d, eids)
+    if changed:
+        d.save("update_schedule", (), changed)
+
+def block_teacher(d, absence):
+    """Records an absence and re-assigns the duties it clashes with; returns how many changed."""
+    d.availability.append(absence)
+    d.save("save_absences", [absence])
+    changed = reallocate(d, core.exams_during(d.timetable, d.allocations, absence))
+    if changed:
+        d.save("update_schedule", (), changed)
+    return len(changed)
+
+# --- VERSION-KEYED VIEW CACHE ---
+# Derived views are built once per data version and shared by all sessions.
+# Arguments starting with "_" are not hashed; the version stands in for them.
+def data_version():
+    return st.session_state.data_version
+
+# Timetable + allocations as one date-indexed frame with categorical columns.
+# Shared, not copied: views below only read it.
+@st.cache_resource(max_entries=4, show_spinner=False)
+def cached_timetable_frame(version, _timetable, _allocations, _ordered):
+    return columnar.build_frame(_timetable, _allocations, _ordered)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_allocation_df(version, date, _frame):
+    return columnar.allocation_table(columnar.day_view(_frame, date))
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def cached_matrix_df(version, _frame, _ordered):
+    return columnar.matrix(_frame, _ordered)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def cached_matrix_excel(version, _frame, _ordered):
+    return convert_df_to_excel(cached_matrix_df(version, _frame, _ordered))
+
+def timetable_frame():
+    return cached_timetable_frame(
+        data_version(), st.session_state.timetable, st.session_state.allocations, ORDERED_CLASSES
+    )
 
-def get_all_subjects_unique():
-    s = set()
-    for v in st.session_state.class_subjects.values(): s.update(v)
-    return sorted(list(s))
+@st.cache_data(max_entries=2, show_spinner=False)
+def cached_workbook(version, _data):
+    return excel_export.workbook_bytes(_data)
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def cached_duty_slips(version, fmt, _data):
+    return duty_slips.build_slips_zip(_data, fmt)
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def cached_backup(version, compressed, _data):
+    return core.dump_backup(_data, compressed)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def cached_workload(version, _frame, _teachers):
+    return analytics.workload(_frame, core.get_all_teacher_names(_teachers))
 
 # ==========================================
 # 4. SIDEBAR: DATA BACKUP
 # ==========================================
-with st.sidebar:
+with st.sidebar, PROFILER.stage("sidebar"):
     st.header("💾 Data Manager")
     
-    current_data = {
-        "teachers": st.session_state.teachers,
-        "timetable": st.session_state.timetable,
-        "allocations": st.session_state.allocations,
-        "class_subjects": st.session_state.class_subjects
-    }
-    json_str = json.dumps(current_data, indent=4, default=str)
-    st.download_button(
-        label="⬇️ Download Backup",
-        data=json_str,
-        file_name="school_data_backup.json",
-        mime="application/json",
-    )
+    # Built only on request, then cached per data version
+    backup_fmt = st.radio("Backup Format", ["JSON", "Compressed (.json.gz)"], horizontal=True)
+    compressed = backup_fmt != "JSON"
+    if st.button("📦 Prepare Backup"):
+        st.session_state.backup_version = data_version()
+    if st.session_state.get('backup_version') == data_version():
+        st.download_button(
+            label="⬇️ Download Backup",
+            data=cached_backup(data_version(), compressed, session_data()),
+            file_name="school_data_backup.json.gz" if compressed else "school_data_backup.json",
+            mime="application/gzip" if compressed else "application/json",
+        )
     
     st.markdown("---")
-    uploaded_file = st.file_uploader("⬆️ Restore Data", type=["json"])
+    uploaded_file = st.file_uploader("⬆️ Restore Data", type=["json", "gz"])
     if uploaded_file is not None:
         if st.button("Confirm Restore"):
             try:
-                data = json.load(uploaded_file)
-                st.session_state.teachers = data.get("teachers", [])
-                st.session_state.timetable = data.get("timetable", [])
-                st.session_state.allocations = data.get("allocations", {})
-                st.session_state.class_subjects = data.get("class_subjects", get_default_subjects())
-                save_to_disk() 
+                get_storage().replace_all(core.read_backup(uploaded_file))
                 st.success("Data Restored! Reloading...")
                 st.rerun()
             except Exception as e:
@@ -289,10 +297,71 @@ with st.sidebar:
 
 st.markdown("<h1>🏫 Exam & Invigilation Manager</h1>", unsafe_allow_html=True)
 
+# --- BACKGROUND JOB STATUS ---
+GENERATE_JOB = "Generate Schedule"
+JOB_STAGES = {
+    "placing": "Placing exams", "optimising": "Optimising timetable",
+    "assigning": "Assigning invigilators", "balancing": "Balancing duties", "saving": "Saving",
+}
+
+@st.fragment(run_every=1.0)
+def render_job_status():
+    job = jobs.get(st.session_state.get('schedule_job'))
+    if job is None: return
+    snap = job.snapshot()
+    if snap['status'] == "running":
+        p = snap['progress']
+        text = JOB_STAGES.get(p.get('stage'), "Starting")
+        frac = 0.0
+        if p.get('stage') == "placing":
+            text += f": {p['days_placed']}/{p['total_days']} days"
+            frac = p['days_placed'] / max(1, p['total_days'])
+        elif p.get('stage') == "optimising":
+            text += f": {p['elapsed']:.0f}/{p['budget']:.0f} s"
+            frac = p['elapsed'] / max(1e-9, p['budget'])
+        elif p.get('stage') == "assigning":
+            text += f": {p['exams_assigned']}/{p['total_exams']} exams"
+            frac = p['exams_assigned'] / max(1, p['total_exams'])
+        elif p.get('stage') in ("balancing", "saving"):
+            frac = 1.0
+        c1, c2 = st.columns([4, 1])
+        with c1: st.progress(min(frac, 1.0), text=f"⏳ {text}")
+        with c2:
+            if st.button("✖ Cancel Generation"):
+                job.cancel()
+        return
+    
+    # Finished: show the outcome once and rerun the whole app to load the new schedule
+    st.session_state.schedule_job = None
+    if snap['status'] == "done":
+        st.session_state.optimiser_stats = snap['result']['optimiser']
+        st.session_state.flash_message = ("success", f"Schedule Generated & Teachers Assigned! ({snap['result']['exams']} exams)")
+    elif snap['status'] == "cancelled":
+        st.session_state.flash_message = ("warning", "Schedule generation cancelled; the previous schedule is unchanged.")
+    else:
+        st.session_state.flash_message = ("error", f"Schedule generation failed: {snap['error']}")
+    st.rerun()
+
+# Only one generation at a time across all sessions: follow one started elsewhere
+if not st.session_state.get('schedule_job'):
+    other = jobs.running(GENERATE_JOB)
+    if other is not None:
+        st.session_state.schedule_job = other.id
+if st.session_state.get('schedule_job'):
+    render_job_status()
+# One-off outcome message (job finished, duties reassigned) that survives st.rerun()
+if st.session_state.get('flash_message'):
+    kind, msg = st.session_state.pop('flash_message')
+    getattr(st, kind)(msg)
+
+# Each tab body is a fragment: interacting with a tab reruns only that tab.
+# Saves still call st.rerun(), which refreshes the whole app.
 tabs = st.tabs(["👨‍🏫 Teachers", "📅 Schedule", "✅ Allocation", "🗓️ Matrix Timetable", "📊 Stats", "📚 Subjects"])
 
 # --- TAB 1: TEACHERS ---
-with tabs[0]:
+@st.fragment
+@profiled("tab:teachers")
+def render_teachers_tab():
     c1, c2 = st.columns([1, 1])
     
     with c1:
@@ -316,12 +385,24 @@ with tabs[0]:
                 
         if st.button("💾 Save Teacher", type="primary"):
             if t_name and st.session_state.temp_teacher_mappings:
-                st.session_state.teachers.append({
+                new_t = {
                     "name": t_name,
                     "mappings": st.session_state.temp_teacher_mappings
-                })
+                }
+                # Saving an existing name replaces that teacher's mappings
+                classes = {m['class'] for m in new_t['mappings']}
+                with edit_data() as d:
+                    for i, t in enumerate(d.teachers):
+                        if t['name'] == t_name:
+                            old_t = d.teachers.pop(i)
+                            core.index_remove_teacher(d.teacher_index, old_t)
+                            classes.update(m['class'] for m in old_t.get('mappings', []))
+                            break
+                    d.teachers.append(new_t)
+                    core.index_add_teacher(d.teacher_index, new_t)
+                    d.save("save_teacher", new_t)
+                    reallocate_for_teachers(d, [t_name], classes)
                 st.session_state.temp_teacher_mappings = []
-                save_to_disk()
                 st.success(f"Saved {t_name}")
                 st.rerun()
             else:
@@ -345,18 +426,99 @@ with tabs[0]:
                 del_name = st.selectbox("Select Teacher to Delete", [t['name'] for t in st.session_state.teachers])
             with col_del_2:
                 if st.button("Delete Teacher"):
-                    for i, t in enumerate(st.session_state.teachers):
-                        if t['name'] == del_name:
-                            st.session_state.teachers.pop(i)
-                            save_to_disk()
-                            st.rerun()
-                            break
+                    with edit_data() as d:
+                        for i, t in enumerate(d.teachers):
+                            if t['name'] == del_name:
+                                core.index_remove_teacher(d.teacher_index, d.teachers.pop(i))
+                                d.save("delete_teacher", del_name)
+                                reallocate_for_teachers(d, [del_name], {m['class'] for m in t.get('mappings', [])})
+                                break
+                    st.rerun()
         else:
             st.info("No teachers added.")
         st.markdown("</div>", unsafe_allow_html=True)
+    
+    with st.expander("🗓️ Availability (Leave & Blocked Periods)"):
+        with st.form("absence_form"):
+            a1, a2, a3 = st.columns(3)
+            with a1:
+                a_name = st.selectbox("Teacher", get_all_teacher_names())
+                a_reason = st.text_input("Reason")
+            with a2:
+                a_start = st.date_input("From")
+                a_end = st.date_input("To")
+            with a3:
+                a_slots = st.multiselect("Slots (none = whole day)", list(core.SLOT_PERIODS))
+            if st.form_submit_button("Block Period"):
+                if not a_name:
+                    st.error("Add a teacher first.")
+                elif a_end < a_start:
+                    st.error("'To' must not be before 'From'.")
+                else:
+                    with edit_data() as d:
+                        n = block_teacher(d, core.make_absence(a_name, a_start, a_end, a_slots, a_reason))
+                    st.session_state.flash_message = ("success", f"Blocked {a_name}; {n} exam(s) re-assigned.")
+                    st.rerun()
+        
+        if st.session_state.availability:
+            st.dataframe(pd.DataFrame([{
+                "Teacher": a['teacher'], "From": a['start'], "To": a['end'],
+                "Slots": ", ".join(a.get('slots') or ["All day"]), "Reason": a.get('reason', ""),
+            } for a in st.session_state.availability]), use_container_width=True, hide_index=True)
+            labels = {f"{a['teacher']}: {a['start']} to {a['end']}": a['id'] for a in st.session_state.availability}
+            r1, r2 = st.columns([3, 1])
+            with r1:
+                remove = st.selectbox("Select Entry to Remove", list(labels))
+            with r2:
+                st.write("")
+                if st.button("Remove Entry"):
+                    with edit_data() as d:
+                        d.availability[:] = [a for a in d.availability if a['id'] != labels[remove]]
+                        d.save("delete_absence", labels[remove])
+                    st.rerun()
+    
+    with st.expander("📥 Bulk Import (CSV / Excel)"):
+        st.caption("One row per teacher, class and subject. Columns: teacher, class, subject.")
+        roster_file = st.file_uploader("Roster File", type=["csv", "xlsx"], key="roster_file")
+        if roster_file is not None:
+            try:
+                roster = roster_import.read_roster(roster_file, roster_file.name)
+            except ValueError as e:
+                st.error(str(e))
+                return
+            valid, problems = roster_import.validate_roster(
+                roster, st.session_state.class_subjects, st.session_state.teachers
+            )
+            if not problems.empty:
+                st.warning(f"{len(problems)} row(s) will be skipped:")
+                st.dataframe(problems, use_container_width=True)
+            imported = roster_import.roster_to_teachers(valid, st.session_state.teachers)
+            if imported and st.button(f"Import {len(valid)} Mappings for {len(imported)} Teachers"):
+                classes = set(valid['class'])
+                with edit_data() as d:
+                    by_name = {t['name']: i for i, t in enumerate(d.teachers)}
+                    for t in imported:
+                        if t['name'] in by_name:
+                            i = by_name[t['name']]
+                            core.index_remove_teacher(d.teacher_index, d.teachers[i])
+                            d.teachers[i] = t
+                        else:
+                            d.teachers.append(t)
+                        core.index_add_teacher(d.teacher_index, t)
+                    d.save("save_teachers", imported)
+                    reallocate_for_teachers(d, [t['name'] for t in imported], classes)
+                st.success(f"Imported {len(imported)} teachers")
+                st.rerun()
+            elif not imported:
+                st.info("No valid rows to import.")
+
+with tabs[0]:
+    render_teachers_tab()
 
 # --- TAB 2: SCHEDULE ---
-with tabs[1]:
+@st.fragment
+@profiled("tab:schedule")
+def render_schedule_tab():
     st.markdown("<div class='glass-container'><h3>Auto-Scheduler</h3>", unsafe_allow_html=True)
     
     with st.form("auto_sched"):
@@ -365,90 +527,111 @@ with tabs[1]:
             start_date = st.date_input("Start Date")
         with c2:
             exam_type = st.radio("Exam Type", ["Unit Test (2/day)", "Terminal Exam (1/day)"])
+        
+        optimise = st.toggle("Optimise Timetable (holidays, day cap, hard subjects)")
+        with st.expander("Optimiser Settings"):
+            o1, o2 = st.columns(2)
+            with o1:
+                holidays_txt = st.text_input("Holidays (YYYY-MM-DD, comma separated)")
+                max_days = st.number_input("Max Exam Days (0 = no cap)", min_value=0, value=0)
+                budget = st.slider("Time Budget (seconds)", 1, 60, 5)
+            with o2:
+                hard_subjects = st.multiselect("Hard Subjects (not on consecutive days)", get_all_subjects_unique())
+                pool = st.number_input(
+                    "Invigilators Available per Slot", min_value=0, value=len(st.session_state.teachers)
+                )
             
-        if st.form_submit_button("🚀 Generate Schedule & Assign Teachers"):
-            st.session_state.timetable = [] 
-            st.session_state.allocations = {} 
-            
-            curr_date = start_date
-            max_subs = max([len(v) for v in st.session_state.class_subjects.values()])
-            
+        running = jobs.running(GENERATE_JOB) is not None
+        if st.form_submit_button("🚀 Generate Schedule & Assign Teachers", disabled=running):
             slots_per_day = 2 if "Unit" in exam_type else 1
-            sub_idx = 0
-            
-            while sub_idx < max_subs:
-                while curr_date.weekday() == 6:
-                    curr_date += timedelta(days=1)
-                
-                # SLOT 1
-                if sub_idx < max_subs:
-                    for cls in ORDERED_CLASSES:
-                        subs = st.session_state.class_subjects[cls]
-                        if sub_idx < len(subs):
-                            s1 = subs[sub_idx]
-                            eid = f"{curr_date}_{cls}_Morning"
-                            st.session_state.timetable.append({
-                                "id": eid, "date": str(curr_date), "class": cls,
-                                "subject": s1, "slot": "Morning", 
-                                "rev_p": "1st-2nd", "exam_p": "3rd-4th"
-                            })
-                            auto_assign_exam(eid, cls, s1)
-                
-                # SLOT 2
-                if slots_per_day == 2 and (sub_idx + 1) < max_subs:
-                    for cls in ORDERED_CLASSES:
-                        subs = st.session_state.class_subjects[cls]
-                        if (sub_idx + 1) < len(subs):
-                            s2 = subs[sub_idx + 1]
-                            eid = f"{curr_date}_{cls}_Afternoon"
-                            st.session_state.timetable.append({
-                                "id": eid, "date": str(curr_date), "class": cls,
-                                "subject": s2, "slot": "Afternoon",
-                                "rev_p": "5th-6th", "exam_p": "7th-8th"
-                            })
-                            auto_assign_exam(eid, cls, s2)
-                            
-                sub_idx += slots_per_day
-                curr_date += timedelta(days=1)
-                
-            save_to_disk()
-            st.success("Schedule Generated & Teachers Assigned!")
+            try:
+                holidays = [datetime.fromisoformat(h.strip()).date() for h in holidays_txt.split(",") if h.strip()]
+            except ValueError:
+                st.error("Holidays must be dates like 2026-11-14, separated by commas.")
+                return
+            opt_args = None
+            if optimise:
+                opt_args = dict(
+                    holidays=holidays, max_days=max_days or None, pool=pool or None,
+                    hard_subjects=hard_subjects, time_budget=budget
+                )
+            # Runs on a worker thread; the status bar above the tabs shows progress
+            job_fn = jobs.schedule_job(
+                get_storage(), st.session_state.class_subjects, st.session_state.teachers,
+                start_date, slots_per_day, opt_args, st.session_state.availability, st.session_state.settings
+            )
+            try:
+                job = jobs.submit(GENERATE_JOB, job_fn, exclusive=True)
+            except jobs.JobRunning as e:
+                # Another session started one since this page was drawn: follow that one instead
+                job = e.job
+                st.session_state.flash_message = ("warning", "Another session is already generating a schedule.")
+            st.session_state.schedule_job = job.id
             st.rerun()
+    
+    # Saved with the data, so the CLI, jobs and incremental re-solves all use the same tiers
+    with st.expander("🧭 Backup Invigilator Tiers"):
+        settings = st.session_state.settings
+        t1, t2 = st.columns(2)
+        with t1:
+            hops = st.number_input(
+                "Backup Grades Away", min_value=1, max_value=core.MAX_TIER,
+                value=min(settings["hops"], core.MAX_TIER),
+                help="Teachers of classes up to this many grades away are backup invigilators."
+            )
+        with t2:
+            sibling_tier = st.number_input(
+                "Tier of Other Streams", min_value=1, max_value=core.MAX_TIER,
+                value=min(settings["sibling_tier"], core.MAX_TIER),
+                help="Backup tier of other streams of the same grade, e.g. Class 11 (MPC) for Class 11 (BPC)."
+            )
+        tiers = {"hops": int(hops), "sibling_tier": int(sibling_tier)}
+        if st.button("💾 Save Tiers", disabled=tiers == {k: settings[k] for k in tiers}):
+            with edit_data() as d:
+                d.settings.update(tiers)
+                d.save("save_settings", tiers)
+                changed = reallocate(d, [ex['id'] for ex in d.timetable])
+                if changed:
+                    d.save("update_schedule", (), changed)
+            st.session_state.flash_message = ("success", f"Backup tiers saved; {len(changed)} exam(s) re-assigned.")
+            st.rerun()
+
+    opt = st.session_state.get('optimiser_stats')
+    if opt:
+        msg = f"Optimiser: {opt['days']} exam days, peak {opt['peak']} exams per slot ({opt['iterations']:,} moves tried)."
+        if opt['violations']:
+            st.warning(f"{msg} {opt['violations']} constraint violation(s) could not be removed.")
+        else:
+            st.info(msg)
             
     st.markdown("</div>", unsafe_allow_html=True)
 
+with tabs[1]:
+    render_schedule_tab()
+
 # --- TAB 3: ALLOCATION (Date Filter + Table + Edit) ---
-with tabs[2]:
+@st.fragment
+@profiled("tab:allocation")
+def render_allocation_tab():
     st.markdown("<div class='glass-container'><h3>Allocations</h3>", unsafe_allow_html=True)
     
     if not st.session_state.timetable:
         st.info("No schedule found.")
     else:
         # 1. DATE FILTER
-        all_dates = sorted(list(set(ex['date'] for ex in st.session_state.timetable)))
-        selected_date = st.selectbox("📅 Select Date", all_dates)
+        frame = timetable_frame()
+        dates = columnar.dates(frame)
+        today = str(datetime.now().date())
+        selected_date = st.selectbox("📅 Select Date", dates, index=dates.index(today) if today in dates else 0)
         
-        # Filter exams for this date
-        day_exams = [ex for ex in st.session_state.timetable if ex['date'] == selected_date]
+        # Exams for this date: a slice of the date index
+        day = columnar.day_view(frame, selected_date)
+        day_exams = columnar.day_records(day)
         
         # 2. TABLE VIEW
         st.markdown("#### Overview")
-        table_data = []
-        for ex in day_exams:
-            eid = ex['id']
-            alloc = st.session_state.allocations.get(eid, {})
-            table_data.append({
-                "Class": ex['class'],
-                "Exam": f"{ex['subject']} ({ex['slot']})",
-                "Revision Teacher": alloc.get('rev_teacher', 'Unassigned'),
-                "Invigilator": alloc.get('inv_teacher', 'Unassigned')
-            })
-        
-        df_alloc = pd.DataFrame(table_data)
-        # Sort by Class
+        df_alloc = cached_allocation_df(data_version(), selected_date, frame)
         if not df_alloc.empty:
-            df_alloc['Class'] = pd.Categorical(df_alloc['Class'], categories=ORDERED_CLASSES, ordered=True)
-            df_alloc = df_alloc.sort_values('Class')
             st.dataframe(df_alloc, use_container_width=True, hide_index=True)
         
         # 3. EDIT SECTION
@@ -466,16 +649,20 @@ with tabs[2]:
             
             c1, c2, c3 = st.columns(3)
             
+            # Only teachers free in this slot: not blocked, not invigilating another exam
+            off = core.absent_at(st.session_state.absent, selected_date, target_ex['slot'])
+            on_duty = set(day.loc[(day['slot'] == target_ex['slot']) & (day['id'] != eid), 'inv_teacher'])
+            
             with c1:
                 st.info(f"**Current Revision:** {alloc.get('rev_teacher')}")
-                all_t = get_all_teacher_names()
+                all_t = [t for t in get_all_teacher_names() if t not in off]
                 new_rev = st.selectbox("Change Revision To", [alloc.get('rev_teacher')] + all_t, key="nr")
                 
             with c2:
                 st.success(f"**Current Invigilator:** {alloc.get('inv_teacher')}")
                 backups = alloc.get('backup_invs', [])
                 # Prioritize backups in dropdown
-                inv_opts = [alloc.get('inv_teacher')] + backups + [t for t in all_t if t not in backups]
+                inv_opts = [alloc.get('inv_teacher')] + [t for t in backups + all_t if t not in off and t not in on_duty]
                 # Remove duplicates/None
                 inv_opts = [x for x in list(dict.fromkeys(inv_opts)) if x]
                 
@@ -485,77 +672,180 @@ with tabs[2]:
                 st.write("") 
                 st.write("") 
                 if st.button("💾 Update Allocation", type="primary"):
-                    st.session_state.allocations[eid]['rev_teacher'] = new_rev
-                    st.session_state.allocations[eid]['inv_teacher'] = new_inv
-                    save_to_disk()
+                    with edit_data() as d:
+                        d.allocations[eid] = {**d.allocations.get(eid, {}), 'rev_teacher': new_rev, 'inv_teacher': new_inv}
+                        d.save("save_allocation", eid, d.allocations[eid])
+                    st.rerun()
+            
+            # Moving re-solves this exam only; every other allocation is left alone
+            with st.form("move_exam"):
+                m1, m2, m3 = st.columns(3)
+                with m1:
+                    move_date = st.date_input("Move To Date", datetime.fromisoformat(target_ex['date']).date())
+                with m2:
+                    slots = list(core.SLOT_PERIODS)
+                    move_slot = st.selectbox("Slot", slots, index=slots.index(target_ex['slot']))
+                with m3:
+                    st.write("")
+                    move = st.form_submit_button("📅 Move Exam")
+                if move:
+                    try:
+                        with edit_data() as d:
+                            moved = core.move_exam(d.timetable, d.allocations, eid, move_date, move_slot)
+                            if moved['id'] != eid:
+                                changed = reallocate(d, [moved['id']])
+                                changed[moved['id']] = d.allocations[moved['id']]
+                                d.save("update_schedule", [moved], changed, [eid])
+                    except ValueError as e:
+                        st.error(str(e))
+                    else:
+                        if moved['id'] != eid:
+                            st.rerun()
+            
+            if {alloc.get('rev_teacher'), alloc.get('inv_teacher')} & off:
+                st.warning("A teacher on this exam is marked unavailable for this slot.")
+            
+            # 4. ABSENCE: block the whole day and hand the teacher's duties to others
+            st.markdown("---")
+            st.markdown(f"#### 🚫 Absence on {selected_date}")
+            on_day = sorted((set(day['rev_teacher']) | set(day['inv_teacher'])) - {"Unassigned"})
+            a1, a2 = st.columns([3, 1])
+            with a1:
+                absent_name = st.selectbox("Absent Teacher", on_day, key="absent_name")
+            with a2:
+                st.write("")
+                if absent_name and st.button("Mark Absent & Reassign"):
+                    with edit_data() as d:
+                        n = block_teacher(d, core.make_absence(absent_name, selected_date, reason="Absent"))
+                    st.session_state.flash_message = ("success", f"{absent_name} marked absent on {selected_date}; {n} exam(s) re-assigned.")
                     st.rerun()
         else:
             st.info("No exams for this date.")
             
     st.markdown("</div>", unsafe_allow_html=True)
 
+with tabs[2]:
+    render_allocation_tab()
+
 # --- TAB 4: MATRIX VIEW ---
-with tabs[3]:
+@st.fragment
+@profiled("tab:matrix")
+def render_matrix_tab():
     st.markdown("<div class='glass-container'><h3>🗓️ Timetable Matrix</h3>", unsafe_allow_html=True)
     st.caption("Rows = Dates | Columns = Classes")
     
     if st.session_state.timetable:
-        data = {} 
-        for ex in st.session_state.timetable:
-            d = ex['date']
-            c = ex['class']
-            s = ex['subject']
-            slot_code = "(M)" if "Morning" in ex['slot'] else "(A)"
-            
-            if d not in data: data[d] = {}
-            if c in data[d]:
-                data[d][c] += f"\n{s} {slot_code}"
-            else:
-                data[d][c] = f"{s} {slot_code}"
-                
-        matrix_df = pd.DataFrame.from_dict(data, orient='index')
-        cols = [c for c in ORDERED_CLASSES if c in matrix_df.columns]
-        matrix_df = matrix_df[cols]
-        matrix_df.index.name = "Date"
-        matrix_df.sort_index(inplace=True)
+        frame = timetable_frame()
+        matrix_df = cached_matrix_df(data_version(), frame, ORDERED_CLASSES)
         
         st.dataframe(matrix_df, use_container_width=True)
-        st.download_button("📥 Download Excel", convert_df_to_excel(matrix_df), "matrix_timetable.xlsx")
+        excel = cached_matrix_excel(data_version(), frame, ORDERED_CLASSES)
+        st.download_button("📥 Download Excel", excel, "matrix_timetable.xlsx")
+        
+        # Matrix + allocation register + per-teacher duties + stats
+        if st.button("📦 Prepare Full Workbook"):
+            st.session_state.workbook_version = data_version()
+        if st.session_state.get('workbook_version') == data_version():
+            st.download_button(
+                "📥 Download Full Workbook", cached_workbook(data_version(), session_data()), "exam_workbook.xlsx"
+            )
+
+        # One slip per teacher, zipped
+        slip_fmt = st.radio("Slip format", duty_slips.FORMATS, horizontal=True,
+                            format_func=lambda f: {"xlsx": "Excel", "html": "Printable HTML"}[f])
+        if st.button("📦 Prepare Duty Slips"):
+            with st.spinner("Rendering duty slips..."):
+                cached_duty_slips(data_version(), slip_fmt, session_data())
+            st.session_state.slips_version = (data_version(), slip_fmt)
+        if st.session_state.get('slips_version') == (data_version(), slip_fmt):
+            st.download_button(
+                "📥 Download Duty Slips", cached_duty_slips(data_version(), slip_fmt, session_data()),
+                f"duty_slips_{slip_fmt}.zip", mime="application/zip"
+            )
     else:
         st.info("No schedule available.")
     st.markdown("</div>", unsafe_allow_html=True)
 
+with tabs[3]:
+    render_matrix_tab()
+
 # --- TAB 5: STATS ---
-with tabs[4]:
+@st.fragment
+@profiled("tab:stats")
+def render_stats_tab():
     st.markdown("<div class='glass-container'><h3>Stats</h3></div>", unsafe_allow_html=True)
     if st.session_state.allocations:
-        counts = {t['name']: 0 for t in st.session_state.teachers}
-        for a in st.session_state.allocations.values():
-            inv = a.get('inv_teacher')
-            if inv and inv in counts:
-                counts[inv] += 1
-                
-        df_s = pd.DataFrame(list(counts.items()), columns=["Teacher", "Invigilations"])
-        df_s = df_s.sort_values("Invigilations", ascending=False)
+        w = cached_workload(data_version(), timetable_frame(), st.session_state.teachers)
+        s = w['summary']
         
+        m1, m2, m3, m4, m5 = st.columns(5)
+        m1.metric("Duties", s['duties'])
+        m2.metric("Gini (Invigilation)", s['gini_invigilation'], help="0 = perfectly even load")
+        m3.metric("Max–Min Gap", s['gap_invigilation'], help=f"Invigilations; {s['gap_total']} for all duties")
+        m4.metric("Longest Duty Streak", f"{s['max_consecutive_days']} days")
+        m5.metric("Double-Booked Teachers", s['double_booked'])
+        
+        df_s = w['per_teacher']
         c1, c2 = st.columns([1, 2])
         with c1: st.dataframe(df_s, hide_index=True)
-        with c2: st.bar_chart(df_s.set_index("Teacher"))
+        with c2: st.bar_chart(df_s.set_index("Teacher")[list(analytics.DUTY_TYPES.values())])
+        
+        if not w['double_booked'].empty:
+            st.warning("Teachers with more than one duty of the same kind in one slot:")
+            st.dataframe(w['double_booked'], use_container_width=True, hide_index=True)
+        with st.expander("Duties by Date"):
+            st.dataframe(w['by_date'], use_container_width=True)
+        with st.expander("Duties by Slot"):
+            st.dataframe(w['by_slot'], use_container_width=True)
+
+with tabs[4]:
+    render_stats_tab()
 
 # --- TAB 6: SUBJECTS ---
-with tabs[5]:
+@st.fragment
+@profiled("tab:subjects")
+def render_subjects_tab():
     st.markdown("<div class='glass-container'><h3>Manage Subjects</h3>", unsafe_allow_html=True)
     with st.form("sub_form"):
         target_classes = st.multiselect("Select Classes", ORDERED_CLASSES)
         new_sub = st.text_input("New Subject Name")
         if st.form_submit_button("Add Subject"):
             if new_sub and target_classes:
-                count = 0
-                for c in target_classes:
-                    if new_sub not in st.session_state.class_subjects[c]:
-                        st.session_state.class_subjects[c].append(new_sub)
-                        count += 1
-                if count > 0:
-                    save_to_disk()
-                    st.success(f"Added to {count} classes.")
+                changed = {}
+                with edit_data() as d:
+                    for c in target_classes:
+                        subs = d.class_subjects[c]
+                        if new_sub not in subs:
+                            d.class_subjects[c] = changed[c] = subs + [new_sub]
+                    if changed:
+                        d.save("save_class_subjects", changed)
+                        # Slot the new exams into an existing schedule without regenerating it
+                        new_exams = []
+                        for c in changed:
+                            ex = core.place_subject(d.timetable, c, new_sub)
+                            if ex:
+                                d.timetable.append(ex)
+                                new_exams.append(ex)
+                        if new_exams:
+                            allocs = reallocate(d, [ex['id'] for ex in new_exams])
+                            d.save("update_schedule", new_exams, allocs)
+                if changed:
+                    st.session_state.flash_message = ("success", f"Added {new_sub} to {len(changed)} classes.")
+                    st.rerun()
     st.markdown("</div>", unsafe_allow_html=True)
+
+with tabs[5]:
+    render_subjects_tab()
+
+# ==========================================
+# 6. PERFORMANCE PANEL (profiling only)
+# ==========================================
+PROFILER.end()
+if PROFILER.enabled:
+    with st.sidebar.expander("⏱️ Performance"):
+        runs = PROFILER.records()
+        if runs:
+            st.caption("Milliseconds per stage, most recent run first")
+            df_p = pd.DataFrame(runs)
+            st.dataframe(df_p, hide_index=True)
+            st.download_button("Export Timings (CSV)", df_p.to_csv(index=False), "timings.csv")
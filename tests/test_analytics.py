@@ -0,0 +1,38 @@
+from datetime import date
+
+import analytics
+import columnar
+import scheduler as core
+
+
+def frame_for(allocs):
+    """Four exams over three days; allocs are (revision teacher, invigilator) per exam."""
+    timetable = [
+        core.make_exam(date(2026, 11, 2), "Class 1", "EVS", "Morning"),
+        core.make_exam(date(2026, 11, 2), "Class 2", "EVS", "Morning"),
+        core.make_exam(date(2026, 11, 3), "Class 1", "Maths", "Morning"),
+        core.make_exam(date(2026, 11, 4), "Class 1", "English", "Morning"),
+    ]
+    allocations = {
+        ex["id"]: {"rev_teacher": r, "inv_teacher": i, "backup_invs": []} for ex, (r, i) in zip(timetable, allocs)
+    }
+    return columnar.build_frame(timetable, allocations, ["Class 1", "Class 2"])
+
+
+def test_workload_counts_and_double_bookings():
+    frame = frame_for([("A", "B"), ("C", "B"), ("A", "Unassigned"), ("A", "C")])
+    w = analytics.workload(frame, ["A", "B", "C", "D"])
+    per = w["per_teacher"].set_index("Teacher")
+    assert per.loc["A", ["Revision", "Invigilation", "Total"]].tolist() == [3, 0, 3]
+    assert per.loc["B", "Invigilation"] == 2 and per.loc["D", "Total"] == 0
+    assert per.loc["A", "Max Consecutive Days"] == 3
+    assert per.loc["B", "Max per Day"] == 2
+    assert w["double_booked"]["Teacher"].tolist() == ["B"]
+    assert w["summary"]["double_booked"] == 1
+    assert w["summary"]["gap_total"] == 3
+
+
+def test_gini():
+    assert analytics.gini([2, 2, 2]) == 0.0
+    assert analytics.gini([]) == 0.0
+    assert 0.7 < analytics.gini([0, 0, 0, 9]) < 0.8
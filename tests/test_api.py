@@ -0,0 +1,87 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from datetime import date
+
+import pytest
+
+import api
+import scheduler as core
+from storage import Storage
+
+
+@pytest.fixture
+def server(tmp_path):
+    data = core.empty_data()
+    data["teachers"] = [
+        {"name": "A", "mappings": [{"class": "Class 1", "subject": "English"}]},
+        {"name": "B", "mappings": [{"class": "Class 1", "subject": "Maths"}]},
+    ]
+    core.build_schedule(data, date(2026, 11, 2), 2)
+    with Storage(str(tmp_path / "data.db"), json_path=None) as storage:
+        storage.replace_all(data)
+        srv = api.make_server(storage, port=0)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        yield srv, storage
+        srv.shutdown()
+        srv.server_close()
+
+
+def get(srv, path, etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    req = urllib.request.Request(f"http://127.0.0.1:{srv.server_port}{path}", headers=headers)
+    try:
+        with urllib.request.urlopen(req) as r:
+            return r.status, r.headers["ETag"], json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        body = e.read()
+        return e.code, e.headers["ETag"], json.loads(body) if body else None
+
+
+def test_allocations_by_date_teacher_and_class(server):
+    srv, _ = server
+    status, _, body = get(srv, "/api/allocations?date=2026-11-02")
+    assert status == 200 and body["date"] == "2026-11-02"
+    assert body["allocations"] and all(r["date"] == "2026-11-02" for r in body["allocations"])
+    _, _, body = get(srv, "/api/classes/Class%201/allocations")
+    assert body["allocations"] and all(r["class"] == "Class 1" for r in body["allocations"])
+    _, _, body = get(srv, "/api/teachers/A/allocations")
+    assert all("A" in (r["revision_teacher"], r["invigilator"]) for r in body["allocations"])
+
+
+def test_errors(server):
+    srv, _ = server
+    assert get(srv, "/api/teachers/Nobody/allocations")[0] == 404
+    assert get(srv, "/api/allocations?date=tomorrow")[0] == 400
+    assert get(srv, "/elsewhere")[0] == 404
+
+
+def test_matching_etag_gets_304(server):
+    srv, _ = server
+    _, etag, _ = get(srv, "/api/classes/Class%201/allocations")
+    assert get(srv, "/api/classes/Class%201/allocations", etag)[:2] == (304, etag)
+    assert get(srv, "/api/classes/Class%201/allocations", f'"other", W/{etag}')[0] == 304
+    assert get(srv, "/api/classes/Class%201/allocations", "*")[0] == 304
+    assert get(srv, "/api/classes/Class%201/allocations", etag[:-3] + '"')[0] == 200
+
+
+def test_unrelated_write_keeps_the_etag(server):
+    srv, storage = server
+    path = "/api/classes/Class%201/allocations"
+    _, etag, _ = get(srv, path)
+    storage.save_teacher({"name": "C", "mappings": [{"class": "Class 9", "subject": "Maths"}]})
+    assert get(srv, "/api/version")[2]["version"] == 2
+    assert get(srv, path, etag)[0] == 304
+
+
+def test_related_write_changes_the_etag(server):
+    srv, storage = server
+    path = "/api/classes/Class%201/allocations"
+    _, etag, body = get(srv, path)
+    eid = body["allocations"][0]["id"]
+    alloc = storage.load_allocations()[eid]
+    storage.save_allocation(eid, {**alloc, "inv_teacher": "Unassigned"})
+    status, new_etag, body = get(srv, path, etag)
+    assert status == 200 and new_etag != etag
+    assert body["allocations"][0]["invigilator"] == "Unassigned"
@@ -0,0 +1,94 @@
+import gzip
+import io
+import json
+from datetime import date
+
+import pytest
+
+import scheduler as core
+
+
+def school():
+    data = core.empty_data()
+    data["teachers"] = [{"name": "A", "mappings": [{"class": "Class 1", "subject": "EVS"}]}]
+    data["availability"] = [core.make_absence("A", "2026-11-02", "2026-11-03", reason="Leave")]
+    data["settings"]["hops"] = 2
+    core.build_schedule(data, date(2026, 11, 2), 2)
+    return data
+
+
+def read(raw):
+    return core.read_backup(io.BytesIO(json.dumps(raw).encode("utf-8")))
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_empty_data_round_trip(compressed):
+    data = core.empty_data()
+    assert core.read_backup(io.BytesIO(core.dump_backup(data, compressed))) == data
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_full_data_round_trip(compressed):
+    data = school()
+    blob = core.dump_backup(data, compressed)
+    assert blob[:2] == b"\x1f\x8b" if compressed else blob.startswith(b"{")
+    assert core.read_backup(io.BytesIO(blob)) == json.loads(json.dumps(data, default=str))
+
+
+def test_gzip_is_smaller_and_holds_the_same_json():
+    data = school()
+    plain, packed = core.dump_backup(data), core.dump_backup(data, compressed=True)
+    assert len(packed) < len(plain)
+    assert json.loads(gzip.decompress(packed)) == json.loads(plain)
+
+
+def test_older_backups_get_defaults():
+    restored = read({"teachers": []})
+    assert restored["settings"] == core.DEFAULT_SETTINGS
+    assert restored["availability"] == [] and restored["class_subjects"] == core.get_default_subjects()
+
+
+@pytest.mark.parametrize("payload, message", [
+    (b"[1, 2]", "must be a JSON object"),
+    (b"not json", "not a JSON backup"),
+    (b"\x1f\x8bgarbage", "not a JSON backup"),
+])
+def test_rejects_non_object_payloads(payload, message):
+    with pytest.raises(ValueError, match=message):
+        core.read_backup(io.BytesIO(payload))
+
+
+@pytest.mark.parametrize("entry, message", [
+    ({"teacher": "A", "start": "2026-11-02"}, "missing end"),
+    ({"teacher": "A", "start": "02/11/2026", "end": "2026-11-02"}, "#1 has a date"),
+    ({"teacher": "A", "start": "2026-11-02", "end": None}, "#1 has a date"),
+])
+def test_rejects_bad_availability(entry, message):
+    with pytest.raises(ValueError, match=message):
+        read({"availability": [entry]})
+
+
+def test_checks_every_availability_entry():
+    good = {"teacher": "A", "start": "2026-11-02", "end": "2026-11-02"}
+    with pytest.raises(ValueError, match="#1 has a date"):
+        read({"availability": [{**good, "start": "soon"}, good]})
+
+
+@pytest.mark.parametrize("settings, message", [
+    ([], "settings must be an object"),
+    ({"hops": 0}, "settings.hops"),
+    ({"hops": "2"}, "settings.hops"),
+    ({"sibling_tier": core.MAX_TIER + 1}, "settings.sibling_tier"),
+])
+def test_rejects_bad_settings(settings, message):
+    with pytest.raises(ValueError, match=message):
+        read({"settings": settings})
+
+
+def test_rejects_malformed_records():
+    with pytest.raises(ValueError, match="teacher #1 has no name"):
+        read({"teachers": [{"mappings": []}]})
+    with pytest.raises(ValueError, match="missing slot"):
+        read({"timetable": [{"id": "x", "date": "2026-11-02", "class": "Class 1", "subject": "EVS"}]})
+    with pytest.raises(ValueError, match="allocations"):
+        read({"allocations": []})
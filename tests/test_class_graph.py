@@ -0,0 +1,30 @@
+from datetime import date
+
+import scheduler as core
+
+CLASSES = ["Class 9", "Class 10", "Class 11 (BPC)", "Class 11 (MPC)", "Class 12 (MPC)"]
+
+
+def test_default_tiers():
+    graph = core.as_class_graph(CLASSES)
+    assert graph.near["Class 11 (MPC)"] == {"Class 11 (BPC)": 1, "Class 10": 1, "Class 12 (MPC)": 1}
+    assert core.get_neighbor_classes("Class 9", CLASSES) == ["Class 10"]
+    assert core.get_neighbor_classes("Class 1", CLASSES) == []
+
+
+def test_settings_change_the_tiers():
+    graph = core.as_class_graph(CLASSES, {"hops": 2, "sibling_tier": 2})
+    near = graph.near["Class 11 (MPC)"]
+    assert near["Class 10"] == 1 and near["Class 11 (BPC)"] == 2 and near["Class 9"] == 2
+    assert core.as_class_graph(CLASSES, {"hops": 2, "sibling_tier": 2}) is graph
+
+
+def test_build_schedule_uses_the_saved_tiers():
+    data = core.empty_data()
+    data["class_subjects"] = {"Class 1": ["Maths"], "Class 2": ["EVS"], "Class 3": ["EVS"]}
+    data["teachers"] = [{"name": "Far", "mappings": [{"class": "Class 3", "subject": "EVS"}]}]
+    core.build_schedule(data, date(2026, 11, 2), 2)
+    assert all(a["backup_invs"] == [] for eid, a in data["allocations"].items() if "Class 1" in eid)
+    data["settings"]["hops"] = 2
+    core.build_schedule(data, date(2026, 11, 2), 2)
+    assert all(a["backup_invs"] == ["Far"] for eid, a in data["allocations"].items() if "Class 1" in eid)
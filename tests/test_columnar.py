@@ -0,0 +1,49 @@
+from datetime import date
+
+import pandas as pd
+
+import columnar
+import scheduler as core
+
+
+def matrix_oracle(timetable, ordered_classes):
+    """The original loop-based matrix: one 'Subject (M)' / 'Subject (A)' line per exam."""
+    data = {}
+    for ex in timetable:
+        code = "(M)" if "Morning" in ex['slot'] else "(A)"
+        cell = data.setdefault(ex['date'], {})
+        cell[ex['class']] = f"{cell[ex['class']]}\n{ex['subject']} {code}" if ex['class'] in cell \
+            else f"{ex['subject']} {code}"
+    df = pd.DataFrame.from_dict(data, orient='index')
+    df = df[[c for c in ordered_classes if c in df.columns]]
+    df.index.name = "Date"
+    return df.sort_index()
+
+
+def school():
+    data = core.empty_data()
+    data["teachers"] = [{"name": "A", "mappings": [{"class": "Class 1", "subject": "EVS"}]}]
+    core.build_schedule(data, date(2026, 11, 2), 2)
+    # Two exams of one class in one day, and a class with a gap
+    data["timetable"].append(core.make_exam(date(2026, 11, 2), "Class 1", "Art", "Afternoon"))
+    data["timetable"] = [ex for ex in data["timetable"] if not (ex["class"] == "Class 3" and ex["slot"] == "Morning")]
+    return data, core.get_ordered_classes(data["class_subjects"])
+
+
+def test_matrix_matches_the_loop_version():
+    data, ordered = school()
+    frame = columnar.build_frame(data["timetable"], data["allocations"], ordered)
+    got = columnar.matrix(frame, ordered)
+    want = matrix_oracle(data["timetable"], ordered)
+    pd.testing.assert_frame_equal(got.astype(object), want.astype(object), check_names=True)
+
+
+def test_day_view_and_allocation_table():
+    data, ordered = school()
+    frame = columnar.build_frame(data["timetable"], data["allocations"], ordered)
+    day = columnar.day_view(frame, "2026-11-02")
+    records = columnar.day_records(day)
+    assert {r["id"] for r in records} == {ex["id"] for ex in data["timetable"] if ex["date"] == "2026-11-02"}
+    table = columnar.allocation_table(day)
+    assert list(table["Class"].astype(str)) == sorted(table["Class"].astype(str), key=ordered.index)
+    assert columnar.day_view(frame, "1999-01-01").empty
@@ -0,0 +1,87 @@
+import threading
+from datetime import date
+
+import pytest
+
+import jobs
+import scheduler as core
+from storage import Storage
+
+START = date(2026, 11, 2)
+
+
+@pytest.fixture
+def store(tmp_path):
+    data = core.empty_data()
+    data["teachers"] = [
+        {"name": "A", "mappings": [{"class": "Class 1", "subject": "English"}]},
+        {"name": "B", "mappings": [{"class": "Class 2", "subject": "Maths"}]},
+    ]
+    with Storage(str(tmp_path / "data.db"), json_path=None) as s:
+        s.replace_all(data)
+        yield s
+
+
+def gated(fn):
+    """fn wrapped so it only starts once the returned event is set."""
+    gate = threading.Event()
+
+    def run(job):
+        gate.wait(5)
+        return fn(job)
+    return run, gate
+
+
+def body(store):
+    data = store.load_all()
+    return jobs.schedule_job(store, data["class_subjects"], data["teachers"], START, 2)
+
+
+def finish(job):
+    job._thread.join(10)
+    assert not job.running
+    return job.snapshot()
+
+
+def test_finished_job_commits_the_schedule(store):
+    before = store.versions()
+    snap = finish(jobs.submit("test commit", body(store)))
+    assert snap["status"] == "done"
+    after = store.versions()
+    assert after["version"] == before["version"] + 1
+    timetable = store.load_timetable()
+    assert snap["result"]["exams"] == len(timetable) > 0
+    assert set(store.load_allocations()) == {ex["id"] for ex in timetable}
+
+
+def test_cancelled_job_leaves_storage_unchanged(store):
+    before = store.versions()
+    run, gate = gated(body(store))
+    job = jobs.submit("test cancel", run)
+    job.cancel()
+    gate.set()
+    assert finish(job)["status"] == "cancelled"
+    assert store.versions() == before
+    assert store.load_timetable() == []
+
+
+def test_failed_job_reports_the_error():
+    def boom(job):
+        raise RuntimeError("no teachers")
+    snap = finish(jobs.submit("test fail", boom))
+    assert (snap["status"], snap["error"]) == ("failed", "no teachers")
+
+
+def test_exclusive_submit_refuses_a_second_running_job():
+    run, gate = gated(lambda job: None)
+    first = jobs.submit("test exclusive", run, exclusive=True)
+    try:
+        assert jobs.running("test exclusive") is first
+        with pytest.raises(jobs.JobRunning) as e:
+            jobs.submit("test exclusive", lambda job: None, exclusive=True)
+        assert e.value.job is first
+    finally:
+        gate.set()
+    finish(first)
+    assert jobs.running("test exclusive") is None
+    finish(jobs.submit("test exclusive", lambda job: None, exclusive=True))
@@ -0,0 +1,52 @@
+from collections import Counter
+from datetime import date
+
+import optimiser
+import scheduler as core
+
+START = date(2026, 11, 2)            # a Monday; 2026-11-08 is a Sunday
+HOLIDAYS = [date(2026, 11, 4)]
+CLASS_SUBJECTS = {
+    "Class 1": ["Maths", "Science", "English", "EVS", "Telugu", "Hindi"],
+    "Class 2": ["Science", "Maths", "English", "EVS", "Telugu", "Hindi", "Social"],
+    "Class 3": ["English", "Maths", "EVS", "Science", "Telugu"],
+}
+HARD = ["Maths", "Science"]
+
+
+def optimise(**kw):
+    args = dict(holidays=HOLIDAYS, hard_subjects=HARD, time_budget=0.5, seed=7)
+    args.update(kw)
+    return optimiser.optimise_timetable(CLASS_SUBJECTS, START, 2, **args)
+
+
+def test_no_exams_on_sundays_or_holidays():
+    timetable, _ = optimise()
+    days = {date.fromisoformat(ex["date"]) for ex in timetable}
+    assert all(d.weekday() != 6 for d in days)
+    assert not days & set(HOLIDAYS)
+
+
+def test_every_subject_placed_once_and_one_exam_per_class_per_slot():
+    timetable, _ = optimise()
+    assert Counter((ex["class"], ex["subject"]) for ex in timetable) == Counter(
+        (c, s) for c, subs in CLASS_SUBJECTS.items() for s in subs
+    )
+    assert max(Counter((ex["class"], ex["date"], ex["slot"]) for ex in timetable).values()) == 1
+
+
+def test_hard_subjects_are_kept_apart_when_feasible():
+    timetable, stats = optimise()
+    day_no = {d.isoformat(): i for i, d in enumerate(optimiser.working_days(START, 60, HOLIDAYS))}
+    assert stats["violations"] == 0
+    for cls in CLASS_SUBJECTS:
+        days = sorted(day_no[ex["date"]] for ex in timetable if ex["class"] == cls and ex["subject"] in HARD)
+        assert all(b - a >= 2 for a, b in zip(days, days[1:])), cls
+
+
+def test_no_time_returns_the_greedy_layout():
+    timetable, stats = optimise(time_budget=0, holidays=())
+    greedy = core.generate_timetable(CLASS_SUBJECTS, START, 2)
+    key = lambda ex: (ex["date"], ex["slot"], ex["class"], ex["subject"])
+    assert sorted(map(key, timetable)) == sorted(map(key, greedy))
+    assert stats["iterations"] == 0 and not stats["improved"]
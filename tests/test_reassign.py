@@ -0,0 +1,87 @@
+from datetime import date
+
+import scheduler as core
+
+DAY = date(2026, 11, 2)
+CLASSES = ["Class 4", "Class 5", "Class 6", "Class 9"]
+
+
+def teacher(name, *pairs):
+    return {"name": name, "mappings": [{"class": c, "subject": s} for c, s in pairs]}
+
+
+def school():
+    teachers = [
+        teacher("A", ("Class 5", "Maths")),
+        teacher("B", ("Class 5", "English")),
+        teacher("C", ("Class 5", "EVS")),
+        teacher("D", ("Class 5", "Maths")),
+    ]
+    exam = core.make_exam(DAY, "Class 5", "Maths", "Morning")
+    allocations = {exam["id"]: {"rev_teacher": "A", "inv_teacher": "B", "backup_invs": ["B", "C"]}}
+    return teachers, [exam], allocations
+
+
+def test_valid_choices_are_kept():
+    teachers, timetable, allocations = school()
+    idx = core.build_teacher_index(teachers)
+    changed = core.reassign_exams(timetable, allocations, idx, CLASSES, [timetable[0]["id"]])
+    assert changed == {}
+    assert allocations[timetable[0]["id"]]["rev_teacher"] == "A"
+    assert allocations[timetable[0]["id"]]["inv_teacher"] == "B"
+
+
+def test_revision_teacher_who_stopped_teaching_the_subject_is_replaced():
+    teachers, timetable, allocations = school()
+    teachers[0] = teacher("A", ("Class 9", "Social"))
+    idx = core.build_teacher_index(teachers)
+    core.reassign_exams(timetable, allocations, idx, CLASSES, [timetable[0]["id"]])
+    assert allocations[timetable[0]["id"]]["rev_teacher"] == "D"
+
+
+def test_invigilator_outside_every_tier_is_replaced():
+    teachers, timetable, allocations = school()
+    teachers[1] = teacher("B", ("Class 9", "English"))
+    idx = core.build_teacher_index(teachers)
+    core.reassign_exams(timetable, allocations, idx, CLASSES, [timetable[0]["id"]])
+    alloc = allocations[timetable[0]["id"]]
+    assert alloc["inv_teacher"] == "C"
+    assert "B" not in alloc["backup_invs"]
+
+
+def test_invigilator_now_teaching_the_subject_is_replaced():
+    teachers, timetable, allocations = school()
+    teachers[1] = teacher("B", ("Class 5", "English"), ("Class 6", "Maths"))
+    idx = core.build_teacher_index(teachers)
+    core.reassign_exams(timetable, allocations, idx, CLASSES, [timetable[0]["id"]])
+    assert allocations[timetable[0]["id"]]["inv_teacher"] == "C"
+
+
+def test_invigilator_busy_in_the_same_slot_is_replaced():
+    teachers, timetable, allocations = school()
+    other = core.make_exam(DAY, "Class 4", "EVS", "Morning")
+    timetable.append(other)
+    allocations[other["id"]] = {"rev_teacher": "Unassigned", "inv_teacher": "B", "backup_invs": ["B"]}
+    idx = core.build_teacher_index(teachers)
+    core.reassign_exams(timetable, allocations, idx, CLASSES, [timetable[0]["id"]])
+    assert allocations[timetable[0]["id"]]["inv_teacher"] == "C"
+    assert allocations[other["id"]]["inv_teacher"] == "B"
+
+
+def test_absent_teachers_are_replaced():
+    teachers, timetable, allocations = school()
+    idx = core.build_teacher_index(teachers)
+    absent = core.build_absence_index([core.make_absence("A", str(DAY)), core.make_absence("B", str(DAY))])
+    core.reassign_exams(timetable, allocations, idx, CLASSES, [timetable[0]["id"]], absent)
+    alloc = allocations[timetable[0]["id"]]
+    assert (alloc["rev_teacher"], alloc["inv_teacher"]) == ("D", "C")
+
+
+def test_exams_of_one_class_and_subject_share_a_candidate_list():
+    teachers, timetable, _ = school()
+    timetable.append(core.make_exam(date(2026, 11, 3), "Class 5", "Maths", "Morning"))
+    idx = core.build_teacher_index(teachers)
+    allocations = {}
+    core.reassign_exams(timetable, allocations, idx, CLASSES, [ex["id"] for ex in timetable])
+    first, second = (allocations[ex["id"]]["backup_invs"] for ex in timetable)
+    assert first is second
@@ -0,0 +1,53 @@
+import io
+
+import pandas as pd
+import pytest
+
+import roster_import
+
+CLASS_SUBJECTS = {"Class 1": ["EVS", "Maths"], "Class 2": ["English"]}
+
+
+def roster(rows):
+    return pd.DataFrame(rows, columns=roster_import.COLUMNS)
+
+
+def test_read_roster_normalises_headers():
+    df = roster_import.read_roster(io.BytesIO(b"Teacher Name , Classes,Subjects\nA,Class 1,EVS\n"), "r.csv")
+    assert df.to_dict("records") == [{"teacher": "A", "class": "Class 1", "subject": "EVS"}]
+    with pytest.raises(ValueError, match="subject"):
+        roster_import.read_roster(io.BytesIO(b"teacher,class\nA,Class 1\n"), "r.csv")
+
+
+def test_each_problem_is_reported_once():
+    df = roster([
+        ["A", "Class 1", "EVS"],
+        [" B ", "Class 1", "Maths "],
+        ["", "Class 1", "EVS"],
+        ["C", "Class 9", "EVS"],
+        ["C", "Class 1", "Dance"],
+        ["C", "Class 2", "Maths"],
+        ["A", "Class 1", "EVS"],
+        ["D", "Class 2", "English"],
+    ])
+    existing = [{"name": "D", "mappings": [{"class": "Class 2", "subject": "English"}]}]
+    valid, invalid = roster_import.validate_roster(df, CLASS_SUBJECTS, existing)
+    assert valid.values.tolist() == [["A", "Class 1", "EVS"], ["B", "Class 1", "Maths"]]
+    assert invalid["Problem"].tolist() == [
+        "Blank teacher, class or subject", "Unknown class", "Unknown subject",
+        "Subject not taught in this class", "Duplicate row", "Teacher already has this mapping",
+    ]
+
+
+def test_roster_to_teachers_keeps_existing_mappings():
+    valid = roster([["A", "Class 1", "EVS"], ["A", "Class 1", "Maths"], ["B", "Class 2", "English"]])
+    existing = [{"name": "A", "mappings": [{"class": "Class 2", "subject": "English"}]}]
+    teachers = roster_import.roster_to_teachers(valid, existing)
+    assert teachers == [
+        {"name": "A", "mappings": [
+            {"class": "Class 2", "subject": "English"},
+            {"class": "Class 1", "subject": "EVS"},
+            {"class": "Class 1", "subject": "Maths"},
+        ]},
+        {"name": "B", "mappings": [{"class": "Class 2", "subject": "English"}]},
+    ]
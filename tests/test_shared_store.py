@@ -0,0 +1,87 @@
+from datetime import date
+
+import pytest
+
+import scheduler as core
+from shared_store import SharedStore
+from storage import Storage
+
+
+@pytest.fixture
+def store(tmp_path):
+    data = core.empty_data()
+    data["teachers"] = [
+        {"name": "A", "mappings": [{"class": "Class 1", "subject": "English"}]},
+        {"name": "B", "mappings": [{"class": "Class 1", "subject": "Maths"}]},
+    ]
+    core.build_schedule(data, date(2026, 11, 2), 2)
+    with Storage(str(tmp_path / "data.db"), json_path=None) as storage:
+        storage.replace_all(data)
+        yield SharedStore(storage)
+
+
+def test_draft_copies_leave_the_published_snapshot_untouched(store):
+    before = store.current()
+    teachers = list(before.teachers)
+    with store.edit() as d:
+        d.teachers.append({"name": "C", "mappings": []})
+        d.save("save_teacher", d.teachers[-1])
+        assert before.teachers == teachers
+    after = store.current()
+    assert after is not before
+    assert after.version == before.version + 1
+    assert before.teachers == teachers
+    assert [t["name"] for t in after.teachers] == ["A", "B", "C"]
+    assert "C" in after.teacher_index["names"] and "C" not in before.teacher_index["names"]
+
+
+def test_untouched_sections_are_shared_between_snapshots(store):
+    before = store.current()
+    with store.edit() as d:
+        d.teachers.append({"name": "C", "mappings": []})
+        d.save("save_teacher", d.teachers[-1])
+    after = store.current()
+    assert after.timetable is before.timetable
+    assert after.allocations is before.allocations
+
+
+def test_failed_edit_writes_and_publishes_nothing(store):
+    before = store.current()
+    with pytest.raises(RuntimeError):
+        with store.edit() as d:
+            d.teachers.append({"name": "C", "mappings": []})
+            d.save("save_teacher", d.teachers[-1])
+            raise RuntimeError("abort")
+    assert store.current() is before
+    assert store.storage.version() == before.version
+    assert [t["name"] for t in store.storage.load_teachers()] == ["A", "B"]
+
+
+def test_external_writes_reload_only_the_changed_section(store):
+    before = store.current()
+    eid = next(iter(before.allocations))
+    store.storage.save_allocation(eid, {**before.allocations[eid], "inv_teacher": "Unassigned"})
+    after = store.current()
+    assert after.version == before.version + 1
+    assert after.allocations[eid]["inv_teacher"] == "Unassigned"
+    assert after.teachers is before.teachers
+    assert after.timetable is before.timetable
+
+
+def test_edit_on_top_of_an_external_write_sees_it(store):
+    store.current()
+    store.storage.save_teacher({"name": "Z", "mappings": []})
+    with store.edit() as d:
+        assert "Z" in [t["name"] for t in d.teachers]
+
+
+def test_edited_allocations_share_candidate_lists(store):
+    before = store.current()
+    eids = list(before.allocations)
+    with store.edit() as d:
+        for eid in eids:
+            d.allocations[eid] = {**d.allocations[eid], "backup_invs": ["A", "B"]}
+            d.save("save_allocation", eid, d.allocations[eid])
+    after = store.current()
+    first, second = (after.allocations[eid]["backup_invs"] for eid in eids[:2])
+    assert first == ["A", "B"] and first is second
@@ -0,0 +1,67 @@
+from collections import Counter
+from datetime import date
+
+import scheduler as core
+import synthetic_school
+
+START = date(2026, 11, 2)
+
+
+def scheduled(n_teachers, seed=0):
+    core.random.seed(seed)
+    data = synthetic_school.make_school(n_teachers, None, mappings_per_teacher=3, seed=seed)
+    core.build_schedule(data, START, 2)
+    return data
+
+
+def test_one_duty_per_teacher_per_slot():
+    data = scheduled(120)
+    per_slot = Counter(
+        (ex["date"], ex["slot"], data["allocations"][ex["id"]]["inv_teacher"]) for ex in data["timetable"]
+    )
+    assert all(n == 1 for (_, _, name), n in per_slot.items() if name != "Unassigned")
+
+
+def test_invigilators_come_from_the_tiers_and_never_teach_the_subject():
+    data = scheduled(120)
+    idx = core.build_teacher_index(data["teachers"])
+    for ex in data["timetable"]:
+        a = data["allocations"][ex["id"]]
+        assert a["inv_teacher"] not in idx["by_subject"].get(ex["subject"], {})
+        if a["inv_teacher"] != "Unassigned":
+            assert a["inv_teacher"] in a["backup_invs"]
+        assert a["rev_teacher"] in idx["by_pair"].get((ex["class"], ex["subject"]), {"Unassigned": 1})
+
+
+def test_class_teachers_are_preferred_over_backups():
+    teachers = [
+        {"name": "Own", "mappings": [{"class": "Class 1", "subject": "English"}]},
+        {"name": "Near", "mappings": [{"class": "Class 2", "subject": "English"}]},
+    ]
+    timetable = [core.make_exam(START, "Class 1", "Maths", "Morning")]
+    allocations = core.assign_all_exams(timetable, core.build_teacher_index(teachers), ["Class 1", "Class 2"])
+    assert allocations[timetable[0]["id"]]["inv_teacher"] == "Own"
+
+
+def test_load_is_balanced_within_a_tier():
+    teachers = [{"name": n, "mappings": [{"class": "Class 1", "subject": "Art"}]} for n in "ABC"]
+    # One exam per slot over three days
+    timetable = [
+        core.make_exam(date(2026, 11, 2 + i // 2), "Class 1", s, ("Morning", "Afternoon")[i % 2])
+        for i, s in enumerate("DEFGHI")
+    ]
+    allocations = core.assign_all_exams(timetable, core.build_teacher_index(teachers), ["Class 1"])
+    assert sorted(Counter(a["inv_teacher"] for a in allocations.values()).values()) == [2, 2, 2]
+
+
+def test_absent_teachers_get_no_duty():
+    data = scheduled(60)
+    first = data["timetable"][0]
+    blocked = data["allocations"][first["id"]]["inv_teacher"]
+    data["availability"] = [core.make_absence(blocked, first["date"])]
+    core.random.seed(0)
+    core.build_schedule(data, START, 2)
+    for ex in data["timetable"]:
+        if ex["date"] == first["date"]:
+            a = data["allocations"][ex["id"]]
+            assert blocked not in (a["inv_teacher"], a["rev_teacher"])
@@ -0,0 +1,73 @@
+import json
+from datetime import date
+
+import pytest
+
+import scheduler as core
+from storage import SECTIONS, Storage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    with Storage(str(tmp_path / "data.db"), json_path=None) as s:
+        yield s
+
+
+def test_each_write_bumps_only_its_sections(storage):
+    start = storage.versions()
+    storage.save_teacher({"name": "A", "mappings": []})
+    after = storage.versions()
+    assert after["version"] == start["version"] + 1
+    assert after["teachers"] == start["teachers"] + 1
+    assert {s: after[s] for s in SECTIONS if s != "teachers"} == {s: start[s] for s in SECTIONS if s != "teachers"}
+    assert storage.last_written() == {"version": after["version"], "teachers": after["teachers"]}
+
+
+def test_batch_is_one_transaction_and_one_version(storage):
+    start = storage.versions()
+    with storage.batch():
+        storage.save_teacher({"name": "A", "mappings": []})
+        storage.save_settings({"hops": 2})
+    after = storage.versions()
+    assert after["version"] == start["version"] + 1
+    assert after["teachers"] == start["teachers"] + 1 and after["settings"] == start["settings"] + 1
+
+
+def test_failed_batch_rolls_back(storage):
+    start = storage.versions()
+    with pytest.raises(RuntimeError):
+        with storage.batch():
+            storage.save_teacher({"name": "A", "mappings": []})
+            raise RuntimeError("abort")
+    assert storage.versions() == start
+    assert storage.load_teachers() == []
+
+
+def test_replace_all_round_trip(storage):
+    data = core.empty_data()
+    data["teachers"] = [{"name": "A", "mappings": [{"class": "Class 1", "subject": "EVS"}]}]
+    data["availability"] = [{"teacher": "A", "start": "2026-11-02", "end": "2026-11-02"}]
+    data["settings"]["hops"] = 2
+    core.build_schedule(data, date(2026, 11, 2), 2)
+    storage.replace_all(data)
+    loaded = storage.load_all()
+    assert loaded["teachers"] == data["teachers"]
+    assert loaded["timetable"] == json.loads(json.dumps(data["timetable"], default=str))
+    assert loaded["allocations"] == data["allocations"]
+    assert loaded["settings"] == {"hops": 2, "sibling_tier": 1}
+    assert loaded["availability"][0]["id"] and loaded["availability"][0]["teacher"] == "A"
+
+
+def test_update_schedule_touches_only_given_rows(storage):
+    data = core.empty_data()
+    data["teachers"] = [{"name": "A", "mappings": [{"class": "Class 1", "subject": "EVS"}]}]
+    core.build_schedule(data, date(2026, 11, 2), 2)
+    storage.replace_all(data)
+    first, second = data["timetable"][:2]
+    storage.update_schedule((), {first["id"]: {"rev_teacher": "X", "inv_teacher": "Y", "backup_invs": []}},
+                            removed=[second["id"]])
+    allocations = storage.load_allocations()
+    assert allocations[first["id"]]["inv_teacher"] == "Y"
+    assert second["id"] not in allocations
+    assert second["id"] not in {ex["id"] for ex in storage.load_timetable()}
+    assert len(allocations) == len(data["allocations"]) - 1